@@ -2,6 +2,8 @@
 ASGI config for api project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests are routed through ``api.async_urls``, which serves signup and signin
+with async views that hash passwords off the event loop.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.1/howto/deployment/asgi/
@@ -9,8 +11,21 @@ https://docs.djangoproject.com/en/3.1/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api.settings')
 
-application = get_asgi_application()
+
+class AsyncURLConfASGIHandler(ASGIHandler):
+    urlconf = 'api.async_urls'
+
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None:
+            request.urlconf = self.urlconf
+        return request, error_response
+
+
+django.setup(set_prefix=False)
+application = AsyncURLConfASGIHandler()
@@ -0,0 +1,9 @@
+from django.urls import include, path
+
+from users import async_views
+
+urlpatterns = [
+    path('signup', async_views.signup, name='signup'),
+    path('signin', async_views.signin, name='signin'),
+    path('', include('users.urls')),
+]
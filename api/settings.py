@@ -1,8 +1,17 @@
 import os
+from datetime import timedelta
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+
+def env_flag(name, default=False):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
 SECRET_KEY = os.environ['SECRET_KEY']
 DEBUG = os.environ['DEBUG']
 ALLOWED_HOSTS = ['*']
@@ -16,7 +25,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'django_extensions',
     'rest_framework',
-    'users'
+    'users.apps.UsersConfig'
 ]
 
 MIDDLEWARE = [
@@ -29,6 +38,65 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Clients authenticate with JWTs, which the views check themselves. DRF's
+# session and basic authentication would otherwise run before the login
+# throttle and check passwords sent in an Authorization header.
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [],
+}
+
+# APP_PROFILE=api serves only the stateless JSON + JWT endpoints: apps and
+# middleware needed by the admin, sessions and messages are not loaded.
+APP_PROFILE = os.environ.get('APP_PROFILE', 'full')
+
+if APP_PROFILE == 'api':
+    INSTALLED_APPS = [
+        'django.contrib.auth',
+        'django.contrib.contenttypes',
+        'rest_framework',
+        'users.apps.UsersConfig'
+    ]
+
+    MIDDLEWARE = [
+        'django.middleware.security.SecurityMiddleware',
+        'django.middleware.common.CommonMiddleware',
+    ]
+
+    REST_FRAMEWORK = {
+        'DEFAULT_AUTHENTICATION_CLASSES': [],
+        'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+        'DEFAULT_PARSER_CLASSES': ['rest_framework.parsers.JSONParser'],
+        'UNAUTHENTICATED_USER': None,
+    }
+
+# SERVER_TIMING reports database, hashing, JWT and serialization time of each
+# request in a Server-Timing header and a JSON log line on users.timing.
+SERVER_TIMING = env_flag('SERVER_TIMING')
+
+if SERVER_TIMING:
+    MIDDLEWARE.insert(0, 'users.middleware.ServerTimingMiddleware')
+
+    LOGGING = {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'handlers': {
+            'console': {'class': 'logging.StreamHandler'},
+        },
+        'loggers': {
+            'users.timing': {'handlers': ['console'], 'level': 'INFO'},
+        },
+    }
+
+# METRICS_DIR enables /metrics. Every worker writes its samples to a memory
+# mapped file in this directory and a scrape sums all of them. Clear it when
+# the whole service restarts. Scrapers authenticate with METRICS_TOKEN as a
+# bearer token; /metrics is not served without one.
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+if METRICS_DIR:
+    MIDDLEWARE.insert(0, 'users.middleware.MetricsMiddleware')
+
 ROOT_URLCONF = 'api.urls'
 
 TEMPLATES = [
@@ -60,6 +128,25 @@ DATABASES = {
     }
 }
 
+# PRAGMA statements run on every new SQLite connection (users.signals)
+SQLITE_PRAGMAS = {}
+
+# DATABASE_PROFILE=tuned keeps connections open between requests and switches
+# SQLite to WAL so readers don't block the writer and writers wait for the
+# lock instead of failing with "database is locked".
+DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'default')
+
+if DATABASE_PROFILE == 'tuned':
+    DATABASES['default']['CONN_MAX_AGE'] = int(
+        os.environ.get('CONN_MAX_AGE', 600)
+    )
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 ** 2)),
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 20000)),
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
@@ -100,3 +187,114 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/3.1/howto/static-files/
 
 STATIC_URL = '/static/'
+
+
+# Users
+# Password hashing runs inline by default. 'thread' or 'process' moves it to a
+# pool of PASSWORD_HASHING_WORKERS, which the async views under api.asgi await
+# without blocking the event loop. This only helps under ASGI: the sync views
+# served by api.wsgi always hash on the request thread, which would otherwise
+# just wait for the pool. Bulk signup always hashes in parallel.
+
+PASSWORD_HASHING_EXECUTOR = os.environ.get(
+    'PASSWORD_HASHING_EXECUTOR', 'inline'
+)
+PASSWORD_HASHING_WORKERS = int(
+    os.environ.get('PASSWORD_HASHING_WORKERS', os.cpu_count() or 1)
+)
+
+# Bulk signup is open to staff users only, for partner onboarding. Every user
+# in a request costs a password hash, so batches are kept small.
+BULK_SIGNUP_MAX_USERS = int(os.environ.get('BULK_SIGNUP_MAX_USERS', 100))
+
+# Serve /me from a per-process cache of rendered profiles. Entries are dropped
+# by User/Phone signals raised in the same process; the timeout bounds how long
+# another worker may keep serving a profile changed elsewhere.
+PROFILE_CACHE_ENABLED = env_flag('PROFILE_CACHE_ENABLED')
+PROFILE_CACHE_TIMEOUT = int(os.environ.get('PROFILE_CACHE_TIMEOUT', 60))
+PROFILE_CACHE_MAX_SIZE = int(os.environ.get('PROFILE_CACHE_MAX_SIZE', 10000))
+
+# Buffer last_login timestamps in memory and write them every flush interval
+# (and at exit) as one UPDATE per batch. Disabled, signin saves them inline.
+LAST_LOGIN_WRITE_BEHIND = env_flag('LAST_LOGIN_WRITE_BEHIND')
+LAST_LOGIN_FLUSH_INTERVAL = float(
+    os.environ.get('LAST_LOGIN_FLUSH_INTERVAL', 5)
+)
+
+# Verified access tokens kept per process, so repeated requests with the same
+# token skip signature and claim checks until the token's exp. 0 disables.
+JWT_VERIFIED_TOKEN_CACHE_SIZE = int(
+    os.environ.get('JWT_VERIFIED_TOKEN_CACHE_SIZE', 10000)
+)
+
+# Per-process Bloom filter of registered e-mails, so signups and signins with
+# unknown e-mails skip the database. Rows added by other workers are picked up
+# at most every EMAIL_BLOOM_REFRESH_INTERVAL seconds with an id > last-seen
+# query; the unique index still rejects duplicates that race past it.
+EMAIL_BLOOM_FILTER = env_flag('EMAIL_BLOOM_FILTER')
+EMAIL_BLOOM_CAPACITY = int(os.environ.get('EMAIL_BLOOM_CAPACITY', 1000000))
+EMAIL_BLOOM_ERROR_RATE = float(
+    os.environ.get('EMAIL_BLOOM_ERROR_RATE', 0.001)
+)
+EMAIL_BLOOM_REFRESH_INTERVAL = float(
+    os.environ.get('EMAIL_BLOOM_REFRESH_INTERVAL', 1)
+)
+
+# Token bucket throttling of signup and signin by client IP and by e-mail,
+# checked before any hashing or database work. Rates are '<count>/<period>'
+# with s, m, h or d periods; the count is also the burst size. Buckets live in
+# this process, or in the default cache (shared by the workers if the cache
+# backend is) with THROTTLE_STORE=cache. Bulk signup takes one token per user
+# from its own bucket per IP. Clients are identified by REMOTE_ADDR; behind
+# proxies, set THROTTLE_NUM_PROXIES to how many of them append to
+# X-Forwarded-For.
+LOGIN_THROTTLE_ENABLED = env_flag('LOGIN_THROTTLE_ENABLED')
+LOGIN_THROTTLE_IP_RATE = os.environ.get('LOGIN_THROTTLE_IP_RATE', '30/m')
+LOGIN_THROTTLE_EMAIL_RATE = os.environ.get('LOGIN_THROTTLE_EMAIL_RATE', '10/m')
+BULK_SIGNUP_THROTTLE_RATE = os.environ.get(
+    'BULK_SIGNUP_THROTTLE_RATE', '1000/h'
+)
+THROTTLE_NUM_PROXIES = int(os.environ.get('THROTTLE_NUM_PROXIES', 0))
+THROTTLE_STORE = os.environ.get('THROTTLE_STORE', 'memory')
+THROTTLE_MAX_KEYS = int(os.environ.get('THROTTLE_MAX_KEYS', 100000))
+
+# Signup and signin also return a refresh token. Clients trade it at
+# /token/refresh for a new access token without a password check. With
+# TOKEN_REVOCATION on, they also get a new refresh token each time and the
+# traded one is revoked, at the cost of one INSERT per refresh, so active
+# sessions keep sliding forward. Without revocation the traded token would
+# stay valid next to the new one, so refresh tokens are not rotated.
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(
+        minutes=int(os.environ.get('JWT_ACCESS_TOKEN_MINUTES', 5))
+    ),
+    'REFRESH_TOKEN_LIFETIME': timedelta(
+        days=int(os.environ.get('JWT_REFRESH_TOKEN_DAYS', 1))
+    ),
+    'ROTATE_REFRESH_TOKENS': True,
+    'BLACKLIST_AFTER_ROTATION': True,
+}
+
+# Token signing. HS256 signs with SECRET_KEY. RS256, RS384, RS512 and EdDSA
+# sign with the PEM private key in JWT_PRIVATE_KEY_FILE, which needs the
+# cryptography package. Their public keys are served at
+# /.well-known/jwks.json, cached by clients for JWKS_MAX_AGE seconds, so other
+# services can verify tokens without calling /me. Tokens name their key with
+# a kid header. During a key rotation, JWT_PUBLIC_KEY_FILES lists the retired
+# public keys (comma separated) that are still accepted and published.
+JWT_ALGORITHM = os.environ.get('JWT_ALGORITHM', 'HS256')
+JWT_PRIVATE_KEY_FILE = os.environ.get('JWT_PRIVATE_KEY_FILE')
+JWT_PUBLIC_KEY_FILES = [
+    path for path in os.environ.get('JWT_PUBLIC_KEY_FILES', '').split(',')
+    if path
+]
+JWKS_MAX_AGE = int(os.environ.get('JWKS_MAX_AGE', 3600))
+
+# Token revocation by jti, through /signout. Each process keeps the revoked
+# jtis in memory and picks up revocations made by other workers at most every
+# TOKEN_REVOCATION_REFRESH_INTERVAL seconds with an id > last-seen query, so
+# authenticated requests don't query the revocations table.
+TOKEN_REVOCATION = env_flag('TOKEN_REVOCATION')
+TOKEN_REVOCATION_REFRESH_INTERVAL = float(
+    os.environ.get('TOKEN_REVOCATION_REFRESH_INTERVAL', 1)
+)
@@ -0,0 +1,34 @@
+"""gunicorn settings for the API
+
+The app is imported and warmed up once in the master, before workers are
+forked, so the workers share those pages copy-on-write and serve their first
+requests without paying for imports or lazy setup.
+
+Every setting can be overridden with the GUNICORN_* variables below."""
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+preload_app = True
+
+# Cores this container may run on, which can be fewer than the host has
+cores = len(os.sched_getaffinity(0))
+
+# Password hashing keeps a core busy and releases the GIL, so one process per
+# core with a few threads each keeps every core hashing while other threads
+# wait on the database.
+workers = int(os.environ.get('GUNICORN_WORKERS', cores))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+
+def when_ready(server):
+    from users.warmup import warm_up
+
+    warm_up()
+
+
+def pre_fork(server, worker):
+    # Connections opened in the master must not be shared with workers
+    from django.db import connections
+
+    connections.close_all()
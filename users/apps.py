@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class UsersConfig(AppConfig):
+    name = 'users'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .signing import install_token_backend
+
+        install_token_backend()
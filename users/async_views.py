@@ -0,0 +1,133 @@
+"""Async signup and signin views served by api.asgi
+
+Password hashing is awaited on the configured hashing pool so the event loop
+keeps serving other requests, while database work runs through
+sync_to_async."""
+import json
+import math
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework.exceptions import ValidationError
+
+from . import hashing
+from .bloom import email_index
+from .constants import (
+    MISSING_FIELD_ERROR, INVALID_LOGIN_ERROR, TOO_MANY_REQUESTS_ERROR
+)
+from .models import User
+from .serializers import (
+    UserModelSerializer, UserLoginSerializer, UserFastSerializer
+)
+from .throttling import (
+    IPTokenBucketThrottle, EmailTokenBucketThrottle, get_client_ip,
+    get_email_key
+)
+from .utils import (
+    get_token_for_user, get_refresh_token_for_user, get_error_message
+)
+
+
+def get_json(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def get_throttle_wait(request, data):
+    """Seconds a throttled request must wait, or None when it may proceed
+
+    Takes the parsed body, since the request stream can only be read once."""
+    throttles = [
+        (IPTokenBucketThrottle(), get_client_ip(request)),
+        (EmailTokenBucketThrottle(), get_email_key(data.get('email'))),
+    ]
+    waits = [
+        throttle.wait()
+        for throttle, key in throttles
+        if not throttle.allow_key(key)
+    ]
+    return max(waits) if waits else None
+
+
+def throttled_response(wait):
+    response_data = {'message': TOO_MANY_REQUESTS_ERROR, 'errorCode': 429}
+    response = JsonResponse(response_data, status=429)
+    response['Retry-After'] = str(math.ceil(wait))
+    return response
+
+
+def error_response(message):
+    response_data = {'message': message, 'errorCode': 400}
+    return JsonResponse(response_data, status=400)
+
+
+def create_user(serializer, encoded_password):
+    user = serializer.save(encoded_password=encoded_password)
+    return {
+        'user': UserFastSerializer(user).data,
+        'token': get_token_for_user(user),
+        'refreshToken': get_refresh_token_for_user(user)
+    }
+
+
+async def signup(request):
+    if request.method != 'POST':
+        return JsonResponse({'detail': 'Method not allowed'}, status=405)
+
+    data = get_json(request)
+    wait = get_throttle_wait(request, data)
+    if wait is not None:
+        return throttled_response(wait)
+
+    data['first_name'] = data.pop('firstName', '')
+    data['last_name'] = data.pop('lastName', '')
+
+    serializer = UserModelSerializer(data=data)
+    if not await sync_to_async(serializer.is_valid)():
+        return error_response(get_error_message(serializer.errors))
+
+    password = serializer.validated_data['password']
+    encoded_password = await hashing.amake_password(password)
+    try:
+        response_data = await sync_to_async(create_user)(
+            serializer, encoded_password
+        )
+    except ValidationError as error:
+        return error_response(error.detail[0])
+    return JsonResponse(response_data, status=201)
+
+
+async def signin(request):
+    if request.method != 'POST':
+        return JsonResponse({'detail': 'Method not allowed'}, status=405)
+
+    data = get_json(request)
+    wait = get_throttle_wait(request, data)
+    if wait is not None:
+        return throttled_response(wait)
+
+    email = data.get('email')
+    password = data.get('password')
+    if not (email and password):
+        return error_response(MISSING_FIELD_ERROR)
+
+    user = None
+    if await sync_to_async(email_index.might_exist)(email):
+        user = await sync_to_async(User.objects.filter_by_email(email).first)()
+    if user is None:
+        return error_response(INVALID_LOGIN_ERROR)
+    if not await user.acheck_password(password):
+        return error_response(INVALID_LOGIN_ERROR)
+
+    response_data = await sync_to_async(UserLoginSerializer().create)(
+        {'user': user}
+    )
+    return JsonResponse(response_data, status=200)
+
+
+# Clients authenticate with JWTs; csrf_exempt() can't wrap coroutines here
+signup.csrf_exempt = True
+signin.csrf_exempt = True
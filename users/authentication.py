@@ -0,0 +1,40 @@
+import hashlib
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed, InvalidToken
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from .cache import token_cache
+from .revocation import revocation_list
+
+
+class UserJWTAuthentication(JWTAuthentication):
+    def authenticate_token(self, request):
+        """Validates the request's token without loading its user"""
+        header = self.get_header(request)
+        raw_token = self.get_raw_token(header) if header else None
+        if raw_token is None:
+            raise AuthenticationFailed('Missing token')
+
+        return self.get_validated_token(raw_token)
+
+    def get_validated_token(self, raw_token):
+        """Validates a token, reusing the result of earlier validations
+
+        Revocation is checked every time, since it can happen after a token
+        was cached."""
+        if isinstance(raw_token, str):
+            raw_token = raw_token.encode()
+        key = hashlib.sha256(raw_token).digest()
+
+        validated_token = token_cache.get(key)
+        if validated_token is None:
+            validated_token = super().get_validated_token(raw_token)
+            token_cache.set(key, validated_token, validated_token['exp'])
+
+        if revocation_list.is_revoked(validated_token[api_settings.JTI_CLAIM]):
+            raise InvalidToken('Token is revoked')
+
+        return validated_token
@@ -0,0 +1,103 @@
+"""Helpers shared by the benchmark management commands"""
+import os
+import subprocess
+import tempfile
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+
+from .constants import BULK_BATCH_SIZE
+from .models import User, Phone
+
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+
+@contextmanager
+def test_database():
+    """Runs the benchmark against a throwaway file-backed database
+
+    A file is used instead of SQLite's shared in-memory database so that
+    concurrent writers behave as they do in production."""
+    old_name = connection.settings_dict['NAME']
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    old_test_name = test_settings.get('NAME')
+
+    if connection.vendor == 'sqlite':
+        directory = tempfile.mkdtemp(prefix='benchmark-')
+        test_settings['NAME'] = os.path.join(directory, 'db.sqlite3')
+
+    connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False
+    )
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        test_settings['NAME'] = old_test_name
+
+
+def seed_users(count, phones_per_user=1, batch_size=BULK_BATCH_SIZE):
+    """Inserts count users sharing one precomputed password hash
+
+    Returns the ids of the created users. Users are e-mailed
+    user<n>@benchmark.com and their password is BENCHMARK_PASSWORD."""
+    encoded = make_password(BENCHMARK_PASSWORD)
+    start = User.objects.count()
+    for offset in range(0, count, batch_size):
+        end = start + min(offset + batch_size, count)
+        numbers = range(start + offset, end)
+        with transaction.atomic():
+            User.objects.bulk_create([
+                User(
+                    email=f'user{n}@benchmark.com',
+                    normalized_email=f'user{n}@benchmark.com',
+                    password=encoded,
+                    first_name='Bench', last_name=f'Mark{n}',
+                    normalized_first_name='bench',
+                    normalized_last_name=f'mark{n}'
+                )
+                for n in numbers
+            ])
+            ids = list(
+                User.objects.filter(
+                    normalized_email__in=[
+                        f'user{n}@benchmark.com' for n in numbers
+                    ]
+                ).values_list('id', flat=True)
+            )
+            Phone.objects.bulk_create([
+                Phone(user_id=user_id, number=900000000 + index,
+                      area_code=81, country_code='+55')
+                for user_id in ids
+                for index in range(phones_per_user)
+            ])
+
+    return list(User.objects.order_by('id').values_list('id', flat=True))
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(latencies):
+    """Latency percentiles in milliseconds"""
+    latencies = sorted(latencies)
+    return {
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
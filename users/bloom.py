@@ -0,0 +1,146 @@
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+
+from .managers import normalize_email
+
+
+class BloomFilter:
+    """Set membership test with no false negatives
+
+    Sized for the expected number of items and false positive rate, using
+    double hashing over a single BLAKE2b digest."""
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.size = max(
+            int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8
+        )
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        for index in range(self.hashes):
+            yield (first + index * second) % self.size
+
+    def add(self, item):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class EmailIndex:
+    """Bloom filter of the normalized e-mails of registered users
+
+    A negative answer means the e-mail is not registered. A positive answer
+    may be wrong and must be confirmed with the database."""
+
+    def __init__(self):
+        self._filter = None
+        self._capacity = 0
+        self._count = 0
+        self._high_water_mark = 0
+        self._refreshed_at = 0
+        self._lock = threading.RLock()
+
+    @property
+    def enabled(self):
+        return settings.EMAIL_BLOOM_FILTER
+
+    def build(self):
+        """Loads every registered e-mail with a streaming query"""
+        from .models import User
+
+        with self._lock:
+            capacity = max(
+                settings.EMAIL_BLOOM_CAPACITY, User.objects.count() * 2
+            )
+            bloom_filter = BloomFilter(
+                capacity, settings.EMAIL_BLOOM_ERROR_RATE
+            )
+            count = high_water_mark = 0
+            rows = User.objects.order_by().values_list(
+                'id', 'normalized_email'
+            )
+            for user_id, email in rows.iterator(chunk_size=2000):
+                bloom_filter.add(email)
+                count += 1
+                high_water_mark = max(high_water_mark, user_id)
+
+            self._filter = bloom_filter
+            self._capacity = capacity
+            self._count = count
+            self._high_water_mark = high_water_mark
+            self._refreshed_at = time.monotonic()
+
+    def refresh(self):
+        """Adds the users created since the last build or refresh"""
+        from .models import User
+
+        with self._lock:
+            rows = (
+                User.objects.filter(id__gt=self._high_water_mark)
+                .order_by().values_list('id', 'normalized_email')
+            )
+            for user_id, email in rows.iterator(chunk_size=2000):
+                self._add(email)
+                self._high_water_mark = max(self._high_water_mark, user_id)
+            self._refreshed_at = time.monotonic()
+
+            # Past its capacity the false positive rate climbs quickly
+            if self._count > self._capacity:
+                self.build()
+
+    def add(self, email):
+        if not self.enabled or self._filter is None:
+            return
+        with self._lock:
+            self._add(normalize_email(email))
+
+    def _add(self, email):
+        self._filter.add(email)
+        self._count += 1
+
+    def might_exist(self, email):
+        if not self.enabled:
+            return True
+
+        if self._filter is None:
+            # warm_up() builds the filter before gunicorn forks. Elsewhere the
+            # first caller builds it while the others check the database.
+            if not self._lock.acquire(blocking=False):
+                return True
+            try:
+                if self._filter is None:
+                    self.build()
+            finally:
+                self._lock.release()
+
+        email = normalize_email(email)
+        if email in self._filter:
+            return True
+
+        interval = settings.EMAIL_BLOOM_REFRESH_INTERVAL
+        if time.monotonic() - self._refreshed_at >= interval:
+            self.refresh()
+            return email in self._filter
+
+        return False
+
+    def clear(self):
+        with self._lock:
+            self._filter = None
+
+
+email_index = EmailIndex()
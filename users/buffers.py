@@ -0,0 +1,105 @@
+import atexit
+import logging
+import os
+import threading
+
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, DateTimeField, Value, When
+
+from .cache import profile_cache
+from .utils import chunks
+
+logger = logging.getLogger(__name__)
+
+# Every user in the batch adds three query parameters to the UPDATE
+FLUSH_BATCH_SIZE = 300
+
+
+class LastLoginBuffer:
+    """Write-behind buffer for User.last_login
+
+    Keeps the latest login timestamp of each user in memory. A daemon thread
+    writes them every LAST_LOGIN_FLUSH_INTERVAL seconds with batched UPDATEs
+    that only touch last_login, and whatever is left is flushed at exit."""
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def record(self, user_id, timestamp):
+        with self._lock:
+            self._pending[user_id] = timestamp
+        profile_cache.invalidate(user_id)
+        self._ensure_started()
+
+    def flush(self):
+        """Writes the buffered timestamps, returning how many were written"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        user_model = get_user_model()
+        written = 0
+        try:
+            for batch in chunks(list(pending.items()), FLUSH_BATCH_SIZE):
+                last_login = Case(
+                    *(When(pk=pk, then=Value(ts)) for pk, ts in batch),
+                    output_field=DateTimeField()
+                )
+                user_model.objects.filter(
+                    pk__in=[pk for pk, _ in batch]
+                ).update(last_login=last_login)
+                written += len(batch)
+        except Exception:
+            # Requeue what was not written unless a newer login replaced it
+            with self._lock:
+                for pk, timestamp in list(pending.items())[written:]:
+                    self._pending.setdefault(pk, timestamp)
+            raise
+        finally:
+            for pk in pending:
+                profile_cache.invalidate(pk)
+
+        return written
+
+    def stop(self):
+        self._stopped.set()
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Could not flush buffered last_login updates')
+
+    def _ensure_started(self):
+        # A thread started before gunicorn forks does not exist in the worker
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is None:
+                atexit.register(self.stop)
+            self._pid = os.getpid()
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, name='last-login-flush', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(settings.LAST_LOGIN_FLUSH_INTERVAL):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Could not flush buffered last_login updates')
+            finally:
+                connection.close()
+
+
+last_login_buffer = LastLoginBuffer()
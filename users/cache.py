@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class ProfileCache:
+    """Per-process LRU cache of (ETag, rendered profile) keyed by user id"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return settings.PROFILE_CACHE_ENABLED
+
+    def get(self, user_id):
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+
+            expires_at, profile = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+
+            self._entries.move_to_end(user_id)
+            return profile
+
+    def set(self, user_id, profile):
+        if not self.enabled:
+            return
+
+        expires_at = time.monotonic() + settings.PROFILE_CACHE_TIMEOUT
+        with self._lock:
+            self._entries[user_id] = (expires_at, profile)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > settings.PROFILE_CACHE_MAX_SIZE:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+profile_cache = ProfileCache()
+
+
+class VerifiedTokenCache:
+    """Per-process LRU cache of validated tokens keyed by a token digest
+
+    Entries expire at the token's exp claim."""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, token = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return token
+
+    def set(self, key, token, expires_at):
+        max_size = settings.JWT_VERIFIED_TOKEN_CACHE_SIZE
+        if max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (expires_at, token)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = VerifiedTokenCache()
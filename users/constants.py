@@ -1,3 +1,21 @@
 MISSING_FIELD_ERROR = 'Missing fields'
 EMAIL_ALREADY_REGISTERED_ERROR = 'E-mail already exists'
 INVALID_LOGIN_ERROR = 'Invalid e-mail or password'
+TOO_MANY_REQUESTS_ERROR = 'Too many requests'
+INVALID_REFRESH_TOKEN_ERROR = 'Invalid or expired refresh token'
+DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S%f%z'
+
+INVALID_BULK_PAYLOAD_ERROR = 'Expected a list of users'
+EMPTY_BULK_PAYLOAD_ERROR = 'Expected at least one user'
+BULK_LIMIT_EXCEEDED_ERROR = 'Too many users in a single request'
+INVALID_CURSOR_ERROR = 'Invalid cursor'
+
+# Rows per query on the bulk paths; stays below SQLite's 999 parameter limit.
+BULK_BATCH_SIZE = 900
+
+INVALID_IMPORT_ROW_ERROR = 'Invalid row'
+INVALID_PASSWORD_HASH_ERROR = 'Password is not a recognized hash'
+
+# Users per page of the staff listing
+USER_LIST_DEFAULT_LIMIT = 50
+USER_LIST_MAX_LIMIT = 200
@@ -0,0 +1,66 @@
+import csv
+import json
+
+from django.db.models import prefetch_related_objects
+
+from .models import User
+from .serializers import UserFastSerializer
+
+CSV_COLUMNS = [
+    'email', 'firstName', 'lastName', 'created_at', 'last_login', 'phones'
+]
+
+
+def iter_users(chunk_size=2000):
+    """Yields every user with its phones prefetched, one chunk at a time
+
+    Users are read with a streaming iterator() and the phones of each chunk
+    are loaded with one extra query, so memory use does not grow with the
+    size of the table."""
+    users = User.objects.order_by('pk').only(
+        'id', 'email', 'first_name', 'last_name', 'created_at', 'last_login'
+    )
+    chunk = []
+    for user in users.iterator(chunk_size=chunk_size):
+        chunk.append(user)
+        if len(chunk) == chunk_size:
+            prefetch_related_objects(chunk, 'phones')
+            yield from chunk
+            chunk = []
+
+    if chunk:
+        prefetch_related_objects(chunk, 'phones')
+        yield from chunk
+
+
+def write_ndjson(stream, users):
+    count = 0
+    for user in users:
+        stream.write(json.dumps(UserFastSerializer(user).data))
+        stream.write('\n')
+        count += 1
+    return count
+
+
+def write_csv(stream, users):
+    """Writes one row per user, with the phones list encoded as JSON"""
+    writer = csv.writer(stream)
+    writer.writerow(CSV_COLUMNS)
+    count = 0
+    for user in users:
+        data = UserFastSerializer(user).data
+        data['phones'] = json.dumps(data['phones'])
+        writer.writerow([data[column] for column in CSV_COLUMNS])
+        count += 1
+    return count
+
+
+WRITERS = {
+    'ndjson': write_ndjson,
+    'csv': write_csv,
+}
+
+
+def export_users(stream, export_format='ndjson', chunk_size=2000):
+    """Writes every user to stream, returning how many were written"""
+    return WRITERS[export_format](stream, iter_users(chunk_size))
@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+
+import django
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.exceptions import ImproperlyConfigured
+
+from . import metrics, timing
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def create_executor(kind, workers):
+    """Builds the pool configured by PASSWORD_HASHING_EXECUTOR"""
+    if kind == 'inline':
+        return None
+    if kind == 'thread':
+        return ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='password-hashing'
+        )
+    if kind == 'process':
+        # Workers started with 'spawn' need the app registry set up again
+        return ProcessPoolExecutor(
+            max_workers=workers, initializer=django.setup
+        )
+    raise ImproperlyConfigured(
+        f"Unknown PASSWORD_HASHING_EXECUTOR '{kind}'. "
+        "Use 'inline', 'thread' or 'process'."
+    )
+
+
+def get_executor():
+    """Returns the process-wide hashing pool, or None for inline hashing
+
+    The pool is created lazily so every gunicorn worker builds its own after
+    forking."""
+    global _executor
+    if settings.PASSWORD_HASHING_EXECUTOR == 'inline':
+        return None
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = create_executor(
+                    settings.PASSWORD_HASHING_EXECUTOR,
+                    settings.PASSWORD_HASHING_WORKERS
+                )
+    return _executor
+
+
+@contextmanager
+def measure(operation):
+    """Reports the hashing time to Server-Timing and /metrics"""
+    started = time.perf_counter()
+    with timing.phase('hash'):
+        try:
+            yield
+        finally:
+            metrics.observe_password_hash(
+                operation, time.perf_counter() - started
+            )
+
+
+def make_password(password):
+    """Hashes on the calling thread, which would only wait for a pool"""
+    with measure('make'):
+        return hashers.make_password(password)
+
+
+def check_password(password, encoded):
+    with measure('check'):
+        return hashers.check_password(password, encoded)
+
+
+async def amake_password(password):
+    loop = asyncio.get_running_loop()
+    with measure('make'):
+        return await loop.run_in_executor(
+            get_executor(), hashers.make_password, password
+        )
+
+
+async def acheck_password(password, encoded):
+    loop = asyncio.get_running_loop()
+    with measure('check'):
+        return await loop.run_in_executor(
+            get_executor(), hashers.check_password, password, encoded
+        )
+
+
+def must_update(encoded):
+    """Tells if a valid hash was made with outdated hasher settings"""
+    preferred = hashers.get_hasher('default')
+    hasher = hashers.identify_hasher(encoded)
+    return (
+        hasher.algorithm != preferred.algorithm
+        or preferred.must_update(encoded)
+    )
+
+
+def make_passwords(passwords):
+    """Hashes a list of raw passwords in parallel
+
+    Uses the configured pool, or a temporary pool of worker threads when
+    hashing is inline, since PBKDF2 releases the GIL while hashing. Hashes are
+    returned in the same order as the given passwords."""
+    passwords = list(passwords)
+    executor = get_executor()
+    with measure('bulk_make'):
+        if executor is not None:
+            return list(executor.map(hashers.make_password, passwords))
+
+        workers = min(settings.PASSWORD_HASHING_WORKERS, len(passwords))
+        if workers <= 1:
+            return [hashers.make_password(password) for password in passwords]
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(hashers.make_password, passwords))
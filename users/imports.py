@@ -0,0 +1,198 @@
+import csv
+import json
+
+from django.contrib.auth import hashers
+from django.db import IntegrityError
+from rest_framework.exceptions import ValidationError
+
+from .constants import (
+    BULK_BATCH_SIZE, EMAIL_ALREADY_REGISTERED_ERROR, INVALID_IMPORT_ROW_ERROR,
+    INVALID_PASSWORD_HASH_ERROR
+)
+from .managers import normalize_email
+from .models import User
+from .serializers import UserModelSerializer, bulk_create_users
+from .utils import get_error_message, chunks
+
+PASSWORD_FORMATS = ['auto', 'hashed', 'plain']
+
+
+def read_ndjson(stream):
+    """Yields (line number, row) pairs, with None for lines that aren't JSON"""
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row
+
+
+def read_csv(stream):
+    """Yields (line number, row) pairs from a CSV with a header row
+
+    The phones column holds the phones list encoded as JSON, as written by
+    the CSV export."""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        try:
+            row['phones'] = json.loads(row.get('phones') or '[]')
+        except ValueError:
+            row = None
+        yield reader.line_num, row
+
+
+READERS = {
+    'ndjson': read_ndjson,
+    'csv': read_csv,
+}
+
+
+def is_encoded(password):
+    """Tells if password is already a hash from one of PASSWORD_HASHERS"""
+    try:
+        hashers.identify_hasher(password)
+    except ValueError:
+        return False
+    return True
+
+
+def validate_row(serializer, row):
+    """Returns the validated data of an import row, or its error message
+
+    A single serializer validates every row, since building its fields costs
+    more than validating a row."""
+    if not isinstance(row, dict):
+        return INVALID_IMPORT_ROW_ERROR
+
+    data = dict(row)
+    data['first_name'] = data.pop('firstName', data.get('first_name', ''))
+    data['last_name'] = data.pop('lastName', data.get('last_name', ''))
+    try:
+        validated_data = serializer.run_validation(data)
+    except ValidationError as error:
+        return get_error_message(error.detail)
+
+    # Imported users always start without a login
+    validated_data.pop('created_at', None)
+    validated_data.pop('last_login', None)
+    return validated_data
+
+
+class UserImporter:
+    """Loads users batch by batch, reporting rejected rows instead of stopping
+
+    Each batch is validated, checked for e-mails already registered and
+    written with bulk_create_users in its own transaction. Plaintext
+    passwords are hashed on executor, and the hashes of the next batch are
+    computed while the current one is written to the database. Without an
+    executor passwords are hashed inline."""
+
+    def __init__(self, executor=None, batch_size=BULK_BATCH_SIZE,
+                 password_format='auto', on_failure=None, on_batch=None):
+        self.executor = executor
+        self.batch_size = batch_size
+        self.password_format = password_format
+        self.on_failure = on_failure
+        self.on_batch = on_batch
+        self.serializer = UserModelSerializer(context={'bulk': True})
+        self.created = 0
+        self.failed = 0
+
+    def fail(self, line_number, message):
+        self.failed += 1
+        if self.on_failure is not None:
+            self.on_failure(line_number, message)
+
+    def run(self, rows):
+        """Imports (line number, row) pairs and returns (created, failed)"""
+        pending = None
+        for batch in chunks(rows, self.batch_size):
+            prepared = self.prepare(batch)
+            if pending is not None:
+                self.write(*pending)
+            pending = prepared
+
+        if pending is not None:
+            self.write(*pending)
+        return self.created, self.failed
+
+    def prepare(self, batch):
+        """Validates a batch and starts hashing its plaintext passwords"""
+        accepted = []
+        emails = set()
+        for line_number, row in batch:
+            data = validate_row(self.serializer, row)
+            if isinstance(data, str):
+                self.fail(line_number, data)
+                continue
+
+            email = normalize_email(data['email'])
+            if email in emails:
+                self.fail(line_number, EMAIL_ALREADY_REGISTERED_ERROR)
+                continue
+            emails.add(email)
+
+            encoded = self.password_format != 'plain' and is_encoded(
+                data['password']
+            )
+            if self.password_format == 'hashed' and not encoded:
+                self.fail(line_number, INVALID_PASSWORD_HASH_ERROR)
+                continue
+            accepted.append((line_number, data, encoded))
+
+        raw_passwords = [
+            data['password'] for _, data, encoded in accepted if not encoded
+        ]
+        if self.executor is None:
+            hashes = map(hashers.make_password, raw_passwords)
+        else:
+            # map() submits every password now and yields hashes in order
+            hashes = self.executor.map(
+                hashers.make_password, raw_passwords,
+                chunksize=max(len(raw_passwords) // 32, 1)
+            )
+        return accepted, hashes
+
+    def write(self, accepted, hashes):
+        registered = set()
+        emails = [normalize_email(data['email']) for _, data, _ in accepted]
+        for batch in chunks(emails, BULK_BATCH_SIZE):
+            registered.update(
+                User.objects.filter(normalized_email__in=batch)
+                .values_list('normalized_email', flat=True)
+            )
+
+        hashes = iter(hashes)
+        lines, users_data, passwords = [], [], []
+        for (line_number, data, encoded), email in zip(accepted, emails):
+            password = data['password'] if encoded else next(hashes)
+            if email in registered:
+                self.fail(line_number, EMAIL_ALREADY_REGISTERED_ERROR)
+                continue
+            lines.append(line_number)
+            users_data.append(data)
+            passwords.append(password)
+
+        if users_data:
+            try:
+                bulk_create_users(users_data, passwords)
+            except IntegrityError:
+                # Someone registered one of these e-mails since the check:
+                # insert the rows one by one so only the conflicts fail
+                self.write_rows(lines, users_data, passwords)
+            else:
+                self.created += len(users_data)
+
+        if self.on_batch is not None:
+            self.on_batch(self.created, self.failed)
+
+    def write_rows(self, lines, users_data, passwords):
+        for line_number, data, password in zip(lines, users_data, passwords):
+            try:
+                bulk_create_users([data], [password])
+            except IntegrityError:
+                self.fail(line_number, EMAIL_ALREADY_REGISTERED_ERROR)
+            else:
+                self.created += 1
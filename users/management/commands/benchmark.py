@@ -0,0 +1,196 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from users.benchmarks import (
+    BENCHMARK_PASSWORD, test_database, seed_users, summarize, current_commit
+)
+from users.models import User
+from users.utils import get_token_for_user
+
+ENDPOINTS = ['signup', 'signin', 'me']
+
+
+class Command(BaseCommand):
+    help = (
+        'Drives signup, signin and me through the Django test client against '
+        'a seeded throwaway database and reports latency percentiles, '
+        'requests per second and queries per request.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=1000,
+            help='Users seeded before the run (1k to 1M).'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Requests sent to each endpoint.'
+        )
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument(
+            '--endpoints', nargs='+', default=ENDPOINTS, choices=ENDPOINTS
+        )
+        parser.add_argument(
+            '--output', help='Write the results to this JSON file.'
+        )
+        parser.add_argument('--label', default='')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--fast-hasher', action='store_true',
+            help='Hash with MD5 so database costs are not hidden by PBKDF2.'
+        )
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        self._local = threading.local()
+
+        hashers = override_settings()
+        if options['fast_hasher']:
+            hashers = override_settings(PASSWORD_HASHERS=[
+                'django.contrib.auth.hashers.MD5PasswordHasher'
+            ])
+
+        with hashers, test_database():
+            started = time.perf_counter()
+            user_ids = seed_users(options['users'])
+            seed_seconds = time.perf_counter() - started
+            self.stdout.write(
+                f"Seeded {options['users']} users in {seed_seconds:.1f}s"
+            )
+
+            results = {}
+            for endpoint in options['endpoints']:
+                requests = getattr(self, f'{endpoint}_requests')(
+                    user_ids, options['requests']
+                )
+                results[endpoint] = self.run(
+                    requests, options['concurrency']
+                )
+                connection.close()
+
+        report = {
+            'label': options['label'],
+            'commit': current_commit(),
+            'timestamp': timezone.now().isoformat(),
+            'config': {
+                'database_profile': settings.DATABASE_PROFILE,
+                'fast_hasher': options['fast_hasher'],
+                'users': options['users'],
+                'requests': options['requests'],
+                'concurrency': options['concurrency'],
+            },
+            'endpoints': results,
+        }
+        self.print_report(report)
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def signup_requests(self, user_ids, count):
+        url = reverse('signup')
+        stamp = time.time_ns()
+        for n in range(count):
+            data = {
+                'email': f'signup{stamp}-{n}@benchmark.com',
+                'firstName': 'Bench',
+                'lastName': 'Mark',
+                'password': BENCHMARK_PASSWORD,
+                'phones': [
+                    {'number': 987465489, 'area_code': 81,
+                     'country_code': '+55'}
+                ]
+            }
+            yield lambda client, data=data: client.post(
+                url, data, 'application/json'
+            )
+
+    def signin_requests(self, user_ids, count):
+        url = reverse('signin')
+        emails = dict(
+            User.objects.filter(id__in=random.sample(
+                user_ids, min(count, len(user_ids), 900)
+            )).values_list('id', 'email')
+        )
+        emails = list(emails.values())
+        for n in range(count):
+            data = {'email': emails[n % len(emails)],
+                    'password': BENCHMARK_PASSWORD}
+            yield lambda client, data=data: client.post(
+                url, data, 'application/json'
+            )
+
+    def me_requests(self, user_ids, count):
+        url = reverse('me')
+        sample = random.sample(user_ids, min(count, len(user_ids)))
+        tokens = [get_token_for_user(User(pk=user_id)) for user_id in sample]
+        for n in range(count):
+            header = f'Bearer {tokens[n % len(tokens)]}'
+            yield lambda client, header=header: client.get(
+                url, HTTP_AUTHORIZATION=header
+            )
+
+    def run(self, requests, concurrency):
+        requests = list(requests)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            samples = list(executor.map(self.send, requests))
+
+            # Each worker thread opened its own database connection; the
+            # barrier makes every thread pick up exactly one close call.
+            barrier = threading.Barrier(concurrency)
+
+            def close_connection(_):
+                barrier.wait()
+                connection.close()
+
+            list(executor.map(close_connection, range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        latencies = [latency for latency, _, _ in samples]
+        errors = sum(1 for _, status, _ in samples if status >= 400)
+        queries = sum(count for _, _, count in samples)
+        return {
+            'requests': len(samples),
+            'errors': errors,
+            'requests_per_second': round(len(samples) / elapsed, 2),
+            'queries_per_request': round(queries / len(samples), 2),
+            **summarize(latencies),
+        }
+
+    def send(self, request):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            # Failed requests are counted as errors instead of aborting
+            client = self._local.client = Client(raise_request_exception=False)
+
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = request(client)
+            latency = time.perf_counter() - started
+        return latency, response.status_code, len(queries)
+
+    def print_report(self, report):
+        self.stdout.write(
+            f"{'endpoint':<10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'p99 ms':>10}{'queries':>10}{'errors':>8}"
+        )
+        for endpoint, result in report['endpoints'].items():
+            self.stdout.write(
+                f"{endpoint:<10}{result['requests_per_second']:>10}"
+                f"{result['p50_ms']:>10}{result['p95_ms']:>10}"
+                f"{result['p99_ms']:>10}{result['queries_per_request']:>10}"
+                f"{result['errors']:>8}"
+            )
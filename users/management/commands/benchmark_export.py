@@ -0,0 +1,61 @@
+import os
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from users.benchmarks import test_database, seed_users
+from users.exports import WRITERS, export_users
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds growing numbers of users and reports export throughput and '
+        'peak memory, which should stay flat as the table grows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[10000, 100000, 1000000]
+        )
+        parser.add_argument(
+            '--format', choices=sorted(WRITERS), default='ndjson'
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument(
+            '--no-memory', action='store_true',
+            help='Skip the traced run that measures peak memory.'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'users':>10}{'seconds':>10}{'users/s':>12}{'peak MiB':>10}"
+        )
+        with test_database():
+            seeded = 0
+            for size in sorted(options['sizes']):
+                seed_users(size - seeded, phones_per_user=2)
+                seeded = size
+
+                with open(os.devnull, 'w') as sink:
+                    started = time.perf_counter()
+                    count = export_users(
+                        sink, options['format'], options['chunk_size']
+                    )
+                    elapsed = time.perf_counter() - started
+
+                peak = 'n/a'
+                if not options['no_memory']:
+                    with open(os.devnull, 'w') as sink:
+                        tracemalloc.start()
+                        export_users(
+                            sink, options['format'], options['chunk_size']
+                        )
+                        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+                        tracemalloc.stop()
+                    peak = f'{peak:.1f}'
+
+                self.stdout.write(
+                    f'{count:>10}{elapsed:>10.1f}{count / elapsed:>12.0f}'
+                    f'{peak:>10}'
+                )
@@ -0,0 +1,150 @@
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+HOST = '127.0.0.1'
+STARTUP_TIMEOUT = 60
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def post_signup(port):
+    """Sends an incomplete signup, which is validated but touches no table"""
+    connection = http.client.HTTPConnection(HOST, port, timeout=10)
+    try:
+        started = time.perf_counter()
+        connection.request(
+            'POST', '/signup', body='{}',
+            headers={'Content-Type': 'application/json'}
+        )
+        connection.getresponse().read()
+        return time.perf_counter() - started
+    finally:
+        connection.close()
+
+
+def children(pid):
+    found = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as stat:
+                # The command name is parenthesized and may contain spaces
+                fields = stat.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            found.append(int(entry))
+    return found
+
+
+def memory(pid):
+    """RSS, PSS and private (USS) memory of a process, in KiB"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as rollup:
+        for line in rollup:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1])
+    private = values['Private_Clean'] + values['Private_Dirty']
+    return values['Rss'], values['Pss'], private
+
+
+class Command(BaseCommand):
+    help = (
+        'Starts gunicorn with and without gunicorn.conf.py and compares the '
+        'time to the first response, the first requests of each worker and '
+        'the memory of every worker.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument(
+            '--requests', type=int, default=8,
+            help='Requests timed right after startup.'
+        )
+
+    def handle(self, *args, **options):
+        with tempfile.NamedTemporaryFile('w', suffix='.py') as empty_config:
+            setups = {
+                'baseline': ['-c', empty_config.name],
+                'configured': [
+                    '-c', str(settings.BASE_DIR / 'gunicorn.conf.py')
+                ],
+            }
+            results = {
+                name: self.measure(arguments, options)
+                for name, arguments in setups.items()
+            }
+
+        self.stdout.write(
+            f"{'setup':<12}{'ready s':>9}{'first ms':>10}{'max ms':>9}"
+            f"{'RSS MiB':>9}{'PSS MiB':>9}{'USS MiB':>9}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<12}{result['ready']:>9.2f}"
+                f"{result['first'] * 1000:>10.1f}{result['max'] * 1000:>9.1f}"
+                f"{result['rss']:>9.1f}{result['pss']:>9.1f}"
+                f"{result['uss']:>9.1f}"
+            )
+        self.stdout.write('Memory is the mean of the workers.')
+
+    def measure(self, arguments, options):
+        port = free_port()
+        command = [
+            'gunicorn', *arguments,
+            '-b', f'{HOST}:{port}', '-w', str(options['workers']), 'api.wsgi'
+        ]
+        env = {**os.environ, 'GUNICORN_WORKERS': str(options['workers'])}
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            command, cwd=settings.BASE_DIR, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            while True:
+                if process.poll() is not None:
+                    raise CommandError('gunicorn exited during startup')
+                if time.perf_counter() - started > STARTUP_TIMEOUT:
+                    raise CommandError('gunicorn did not answer in time')
+                try:
+                    first = post_signup(port)
+                    break
+                except OSError:
+                    time.sleep(0.01)
+            ready = time.perf_counter() - started
+
+            durations = [post_signup(port) for _ in range(options['requests'])]
+
+            # Give every worker time to boot before reading their memory
+            deadline = time.perf_counter() + STARTUP_TIMEOUT
+            while (len(children(process.pid)) < options['workers']
+                   and time.perf_counter() < deadline):
+                time.sleep(0.1)
+            time.sleep(1)
+            usage = [memory(pid) for pid in children(process.pid)]
+        finally:
+            process.send_signal(signal.SIGTERM)
+            process.wait()
+
+        return {
+            'ready': ready,
+            'first': first,
+            'max': max([first, *durations]),
+            'rss': sum(rss for rss, _, _ in usage) / len(usage) / 1024,
+            'pss': sum(pss for _, pss, _ in usage) / len(usage) / 1024,
+            'uss': sum(uss for _, _, uss in usage) / len(usage) / 1024,
+        }
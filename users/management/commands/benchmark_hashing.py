@@ -0,0 +1,80 @@
+import asyncio
+import os
+import time
+
+from django.contrib.auth import hashers
+from django.core.management.base import BaseCommand
+
+from users.hashing import create_executor
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures signin password checks per second under concurrency and how '
+        'long they stall the event loop, for each hashing executor.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=64)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1
+        )
+        parser.add_argument(
+            '--executors', nargs='+', default=['inline', 'thread', 'process'],
+            choices=['inline', 'thread', 'process']
+        )
+
+    def handle(self, *args, **options):
+        password = 'benchmark-password'
+        encoded = hashers.make_password(password)
+
+        self.stdout.write(
+            f"{'executor':<10}{'logins/s':>12}{'max loop stall (ms)':>22}"
+        )
+        for kind in options['executors']:
+            executor = create_executor(kind, options['workers'])
+            try:
+                rate, stall = asyncio.run(self.run_logins(
+                    executor, password, encoded,
+                    options['logins'], options['concurrency']
+                ))
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+            self.stdout.write(f'{kind:<10}{rate:>12.1f}{stall * 1000:>22.1f}')
+
+    async def run_logins(self, executor, password, encoded, logins,
+                         concurrency):
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(concurrency)
+        done = asyncio.Event()
+        max_stall = 0
+
+        async def heartbeat():
+            # Stands in for the other requests served by the same event loop
+            nonlocal max_stall
+            interval = 0.005
+            while not done.is_set():
+                started = time.perf_counter()
+                await asyncio.sleep(interval)
+                stall = time.perf_counter() - started - interval
+                max_stall = max(max_stall, stall)
+
+        async def login():
+            async with semaphore:
+                if executor is None:
+                    hashers.check_password(password, encoded)
+                else:
+                    await loop.run_in_executor(
+                        executor, hashers.check_password, password, encoded
+                    )
+
+        monitor = asyncio.ensure_future(heartbeat())
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await monitor
+
+        return logins / elapsed, max_stall
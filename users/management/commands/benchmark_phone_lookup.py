@@ -0,0 +1,87 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from users.benchmarks import test_database, seed_users, percentile
+from users.models import User, Phone
+
+USERS = 10000
+INSERT_BATCH_SIZE = 50000
+
+
+def insert_phones(start, count, user_ids):
+    """Inserts phones numbered start to start + count with raw executemany
+
+    Going around the ORM keeps seeding tens of millions of rows practical."""
+    table = Phone._meta.db_table
+    sql = (
+        f'INSERT INTO {table} (country_code, area_code, number, user_id) '
+        'VALUES (%s, %s, %s, %s)'
+    )
+    for offset in range(start, start + count, INSERT_BATCH_SIZE):
+        stop = min(offset + INSERT_BATCH_SIZE, start + count)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, [
+                phone_row(n) + (user_ids[n % len(user_ids)],)
+                for n in range(offset, stop)
+            ])
+
+
+def phone_row(n):
+    return '+55', 11 + n % 89, 100000000 + n // 89
+
+
+class Command(BaseCommand):
+    help = (
+        'Grows the phones table and reports the latency of finding the '
+        'accounts owning a phone number, which should stay flat with the '
+        'phone number index.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+',
+            default=[100000, 1000000, 10000000]
+        )
+        parser.add_argument('--lookups', type=int, default=1000)
+        parser.add_argument(
+            '--no-index', action='store_true',
+            help='Drop the phone number index to compare against a scan.'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'phones':>10}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}"
+        )
+        with test_database():
+            if options['no_index']:
+                with connection.schema_editor() as schema_editor:
+                    for index in Phone._meta.indexes:
+                        schema_editor.remove_index(Phone, index)
+
+            user_ids = seed_users(USERS, phones_per_user=0)
+            seeded = 0
+            for size in sorted(options['sizes']):
+                insert_phones(seeded, size - seeded, user_ids)
+                seeded = size
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+
+                durations = []
+                for _ in range(options['lookups']):
+                    phone = phone_row(random.randrange(size))
+                    started = time.perf_counter()
+                    list(
+                        User.objects.filter_by_phone(*phone)
+                        .values_list('id', flat=True)
+                    )
+                    durations.append((time.perf_counter() - started) * 1000)
+
+                durations.sort()
+                self.stdout.write(
+                    f'{size:>10}{percentile(durations, 0.5):>10.3f}'
+                    f'{percentile(durations, 0.99):>10.3f}'
+                    f'{sum(durations) / len(durations):>10.3f}'
+                )
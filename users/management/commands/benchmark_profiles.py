@@ -0,0 +1,83 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PROFILES = ['full', 'api']
+
+# Runs in a fresh interpreter so imports and app loading are measured cold.
+# The requests carry no token, which exercises the middleware chain
+# and the view without touching the database.
+SCRIPT = '''
+import json, time
+started = time.perf_counter()
+import django
+django.setup()
+from django.test import Client
+from django.urls import reverse
+setup_seconds = time.perf_counter() - started
+
+client = Client()
+url = reverse('me')
+for _ in range(50):
+    client.get(url)
+started = time.perf_counter()
+for _ in range({requests}):
+    client.get(url)
+request_seconds = (time.perf_counter() - started) / {requests}
+
+print(json.dumps({{'setup': setup_seconds, 'request': request_seconds}}))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares startup time and per-request overhead of the full and api '
+        'APP_PROFILE settings.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--runs', type=int, default=5)
+
+    def handle(self, *args, **options):
+        script = SCRIPT.format(requests=options['requests'])
+        results = {}
+        for profile in PROFILES:
+            env = {
+                **os.environ,
+                'APP_PROFILE': profile,
+                'DJANGO_SETTINGS_MODULE': 'api.settings',
+            }
+            runs = []
+            for _ in range(options['runs']):
+                started = time.perf_counter()
+                process = subprocess.run(
+                    [sys.executable, '-c', script], env=env,
+                    cwd=settings.BASE_DIR, capture_output=True, text=True
+                )
+                wall_seconds = time.perf_counter() - started
+                if process.returncode:
+                    raise CommandError(process.stderr)
+                run = json.loads(process.stdout.strip().splitlines()[-1])
+                run['wall'] = wall_seconds
+                runs.append(run)
+            results[profile] = {
+                key: min(run[key] for run in runs)
+                for key in ('setup', 'request', 'wall')
+            }
+
+        self.stdout.write(
+            f"{'profile':<10}{'django.setup ms':>18}{'process ms':>14}"
+            f"{'us/request':>14}"
+        )
+        for profile, result in results.items():
+            self.stdout.write(
+                f"{profile:<10}{result['setup'] * 1000:>18.1f}"
+                f"{result['wall'] * 1000:>14.1f}"
+                f"{result['request'] * 1e6:>14.1f}"
+            )
@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import prefetch_related_objects
+from rest_framework.renderers import JSONRenderer
+
+from users.benchmarks import test_database
+from users.models import User, Phone
+from users.renderers import FastJSONRenderer
+from users.serializers import UserModelSerializer, UserFastSerializer
+from users.utils import format_data
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the per-response cost of rendering a user with '
+        'UserModelSerializer and with UserFastSerializer.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=10000)
+        parser.add_argument('--phones', type=int, default=2)
+
+    def handle(self, *args, **options):
+        with test_database():
+            user = User.objects.create_user(
+                'benchmark@tester.com', 'benchmark',
+                first_name='Bench', last_name='Mark'
+            )
+            Phone.objects.bulk_create([
+                Phone(user=user, number=987465489, area_code=81,
+                      country_code='+55')
+                for _ in range(options['phones'])
+            ])
+            prefetch_related_objects([user], 'phones')
+
+            drf_renderer = JSONRenderer()
+            fast_renderer = FastJSONRenderer()
+
+            def drf_response():
+                data = format_data(UserModelSerializer(user).data)
+                return drf_renderer.render({'user': data})
+
+            def fast_response():
+                data = UserFastSerializer(user).data
+                return fast_renderer.render({'user': data})
+
+            iterations = options['iterations']
+            results = [
+                (
+                    'UserModelSerializer',
+                    self.measure(drf_response, iterations)
+                ),
+                (
+                    'UserFastSerializer',
+                    self.measure(fast_response, iterations)
+                ),
+            ]
+
+        self.stdout.write(f"{'serializer':<22}{'us/response':>14}")
+        for name, seconds in results:
+            self.stdout.write(f'{name:<22}{seconds * 1e6:>14.1f}')
+        speedup = results[0][1] / results[1][1]
+        self.stdout.write(f'speedup: {speedup:.1f}x')
+
+    def measure(self, function, iterations):
+        function()
+        started = time.perf_counter()
+        for _ in range(iterations):
+            function()
+        return (time.perf_counter() - started) / iterations
@@ -0,0 +1,55 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PROFILES = ['default', 'tuned']
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs the benchmark command under each DATABASE_PROFILE with a fast '
+        'hasher and compares throughput and failed requests.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=8)
+
+    def handle(self, *args, **options):
+        results = {}
+        for profile in PROFILES:
+            with tempfile.NamedTemporaryFile(suffix='.json') as output:
+                command = [
+                    sys.executable, str(settings.BASE_DIR / 'manage.py'),
+                    'benchmark', '--fast-hasher',
+                    '--users', str(options['users']),
+                    '--requests', str(options['requests']),
+                    '--concurrency', str(options['concurrency']),
+                    '--output', output.name,
+                ]
+                env = {**os.environ, 'DATABASE_PROFILE': profile}
+                process = subprocess.run(
+                    command, env=env, capture_output=True, text=True
+                )
+                if process.returncode:
+                    raise CommandError(process.stderr)
+                results[profile] = json.load(output)['endpoints']
+
+        self.stdout.write(
+            f"{'endpoint':<10}{'profile':<10}{'req/s':>10}{'p99 ms':>10}"
+            f"{'errors':>8}"
+        )
+        for endpoint in results[PROFILES[0]]:
+            for profile in PROFILES:
+                result = results[profile][endpoint]
+                self.stdout.write(
+                    f"{endpoint:<10}{profile:<10}"
+                    f"{result['requests_per_second']:>10}"
+                    f"{result['p99_ms']:>10}{result['errors']:>8}"
+                )
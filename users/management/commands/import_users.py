@@ -0,0 +1,106 @@
+import json
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.constants import BULK_BATCH_SIZE
+from users.hashing import create_executor
+from users.imports import READERS, PASSWORD_FORMATS, UserImporter
+
+
+class Command(BaseCommand):
+    help = (
+        'Loads users and their phones from NDJSON or CSV with batched '
+        'inserts. Rejected rows are reported and skipped without stopping '
+        'the load.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help="File to read from, or '-' for stdin."
+        )
+        parser.add_argument(
+            '--format', choices=sorted(READERS),
+            help='Defaults to the file extension, or ndjson.'
+        )
+        parser.add_argument('--batch-size', type=int, default=BULK_BATCH_SIZE)
+        parser.add_argument(
+            '--passwords', choices=PASSWORD_FORMATS, default='auto',
+            help=(
+                "'auto' keeps values already encoded by one of "
+                "PASSWORD_HASHERS and hashes the rest."
+            )
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Processes hashing plaintext passwords; 0 hashes inline.'
+        )
+        parser.add_argument(
+            '--errors',
+            help='File receiving one JSON line per rejected row. '
+                 'Defaults to stderr.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        import_format = options['format']
+        if import_format is None:
+            extension = os.path.splitext(path)[1].lstrip('.').lower()
+            import_format = extension if extension in READERS else 'ndjson'
+
+        try:
+            stream = (
+                sys.stdin if path == '-'
+                else open(path, newline='', encoding='utf-8')
+            )
+        except OSError as error:
+            raise CommandError(error)
+
+        errors = open(options['errors'], 'w') if options['errors'] else None
+        executor = (
+            create_executor('process', options['workers'])
+            if options['workers'] > 0 else None
+        )
+        started = time.perf_counter()
+
+        def on_failure(line_number, message):
+            failure = json.dumps({'line': line_number, 'message': message})
+            if errors is not None:
+                errors.write(failure + '\n')
+            else:
+                self.stderr.write(failure)
+
+        def on_batch(created, failed):
+            elapsed = time.perf_counter() - started
+            self.stderr.write(
+                f'{created} created, {failed} rejected '
+                f'({(created + failed) / max(elapsed, 1e-9):.0f} rows/s)'
+            )
+
+        importer = UserImporter(
+            executor=executor,
+            batch_size=options['batch_size'],
+            password_format=options['passwords'],
+            on_failure=on_failure,
+            on_batch=on_batch
+        )
+        try:
+            created, failed = importer.run(
+                READERS[import_format](stream)
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if errors is not None:
+                errors.close()
+            if executor is not None:
+                executor.shutdown()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Imported {created} users, rejected {failed} rows in '
+            f'{elapsed:.1f}s ({(created + failed) / max(elapsed, 1e-9):.0f} '
+            'rows/s)'
+        )
@@ -0,0 +1,93 @@
+import json
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from users.startup import parse_importtime, walk
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports the WSGI application in fresh interpreters with the current '
+        'settings and reports the startup time, the slowest imports and the '
+        'time spent in each AppConfig.ready().'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', default='api.wsgi')
+        parser.add_argument(
+            '--runs', type=int, default=5,
+            help='Untraced startups timed; the fastest one is reported.'
+        )
+        parser.add_argument('--top', type=int, default=15)
+        parser.add_argument(
+            '--depth', type=int, default=2,
+            help='Levels of the import tree to print.'
+        )
+        parser.add_argument(
+            '--budget', type=float,
+            help='Fail when startup takes longer than this many seconds.'
+        )
+
+    def run_probe(self, *options):
+        code = f'from users.startup import probe; probe({self.module!r})'
+        started = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, *options, '-c', code],
+            cwd=settings.BASE_DIR, capture_output=True, text=True
+        )
+        elapsed = time.perf_counter() - started
+        if process.returncode:
+            raise CommandError(process.stderr)
+        return elapsed, json.loads(process.stdout), process.stderr
+
+    def handle(self, *args, **options):
+        self.module = options['module']
+        startups = [self.run_probe()[0] for _ in range(options['runs'])]
+        _, result, importtime = self.run_probe('-X', 'importtime')
+        tree = parse_importtime(importtime)
+
+        startup = min(startups)
+        self.stdout.write(
+            f'Startup of {self.module}: {startup * 1000:.0f} ms '
+            f'(fastest of {len(startups)}, interpreter included)'
+        )
+        self.stdout.write(
+            f"Importing {self.module}: {result['import'] * 1000:.0f} ms\n"
+        )
+
+        self.stdout.write('AppConfig.ready()')
+        ready = sorted(
+            result['ready'].items(), key=lambda item: item[1], reverse=True
+        )
+        for name, duration in ready:
+            self.stdout.write(f'{duration * 1000:>10.1f} ms  {name}')
+
+        self.stdout.write('\nImport tree, cumulative ms')
+        self.write_tree(tree, options['top'], options['depth'])
+
+        self.stdout.write('\nSlowest modules by self time, ms')
+        slowest = sorted(
+            walk(tree), key=lambda node: node.self_time, reverse=True
+        )
+        for node in slowest[:options['top']]:
+            self.stdout.write(f'{node.self_time / 1000:>10.1f}  {node.name}')
+
+        budget = options['budget']
+        if budget is not None and startup > budget:
+            raise CommandError(
+                f'Startup took {startup:.3f}s, over the {budget:.3f}s budget'
+            )
+
+    def write_tree(self, nodes, top, depth, level=0):
+        if level == depth:
+            return
+        nodes = sorted(nodes, key=lambda node: node.cumulative, reverse=True)
+        for node in nodes[:top]:
+            self.stdout.write(
+                f"{node.cumulative / 1000:>10.1f}  {'  ' * level}{node.name}"
+            )
+            self.write_tree(node.children, top, depth, level + 1)
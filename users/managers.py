@@ -1,6 +1,31 @@
 from django.contrib.auth.base_user import BaseUserManager
 
+
+def normalize_email(email):
+    """Form of an e-mail used to look users up and detect duplicates"""
+    return (email or '').strip().lower()
+
+
+def normalize_name(name):
+    """Form of a name used to search users by prefix"""
+    return (name or '').strip().lower()
+
+
 class UserManager(BaseUserManager):
+    def filter_by_email(self, email):
+        return self.filter(normalized_email=normalize_email(email))
+
+    def filter_by_phone(self, country_code, area_code, number):
+        """Users owning the phone, found through the phone number index"""
+        return self.filter(
+            phones__country_code=country_code,
+            phones__area_code=area_code,
+            phones__number=number
+        ).distinct()
+
+    def get_by_natural_key(self, username):
+        return self.get(normalized_email=normalize_email(username))
+
     def create_user(self, email, password=None, **extra_fields):
         if not email:
             raise ValueError('E-mail is mandatory')
@@ -17,6 +42,7 @@ class UserManager(BaseUserManager):
         if not (email and password):
             raise ValueError('E-mail and password are mandatory')
 
+        extra_fields.setdefault('is_staff', True)
         user = self.model(
             email=self.normalize_email(email),
             **extra_fields
@@ -0,0 +1,214 @@
+"""Prometheus metrics shared by every gunicorn worker
+
+Each process appends its samples to its own memory-mapped file in
+METRICS_DIR, and a scrape of any worker sums the files of all of them."""
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+
+INITIAL_FILE_SIZE = 1024 * 1024
+
+REQUEST_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+HASH_BUCKETS = (0.01, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0)
+
+# Every label value adds an entry to each worker's file for good, so clients
+# must not be able to make up new ones
+HTTP_METHODS = {
+    'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'TRACE'
+}
+
+METRICS = {
+    'http_requests_total': (
+        'counter', 'Responses sent, by endpoint, method and status code.'
+    ),
+    'http_request_duration_seconds': (
+        'histogram', 'Time spent serving a request, by endpoint.'
+    ),
+    'password_hash_duration_seconds': (
+        'histogram', 'Time spent hashing or checking passwords.'
+    ),
+}
+
+
+class MmapedValues:
+    """Float values stored by key in a memory-mapped file
+
+    The file starts with the number of bytes in use, followed by entries made
+    of the key length, the UTF-8 key padded to 8 bytes and a double."""
+
+    def __init__(self, path):
+        self._path = path
+        self._positions = {}
+        self._file = open(path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(INITIAL_FILE_SIZE)
+        self._capacity = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), self._capacity)
+
+        self._used = struct.unpack_from('i', self._map, 0)[0] or 8
+        for key, _, position in self._read_entries(self._map, self._used):
+            self._positions[key] = position
+
+    @staticmethod
+    def _read_entries(data, used):
+        position = 8
+        while position < used:
+            length = struct.unpack_from('i', data, position)[0]
+            key_end = position + 4 + length
+            key = bytes(data[position + 4:key_end]).decode()
+            value_position = key_end + (-(length + 4) % 8)
+            value = struct.unpack_from('d', data, value_position)[0]
+            yield key, value, value_position
+            position = value_position + 8
+
+    @classmethod
+    def read_file(cls, path):
+        with open(path, 'rb') as metrics_file:
+            data = metrics_file.read()
+        if len(data) < 8:
+            return
+        used = struct.unpack_from('i', data, 0)[0]
+        for key, value, _ in cls._read_entries(data, used):
+            yield key, value
+
+    def _add_entry(self, key):
+        encoded = key.encode()
+        padding = -(len(encoded) + 4) % 8
+        entry = struct.pack(f'i{len(encoded)}s{padding}x', len(encoded),
+                            encoded)
+        while self._used + len(entry) + 8 > self._capacity:
+            self._capacity *= 2
+            self._file.truncate(self._capacity)
+            self._map = mmap.mmap(self._file.fileno(), self._capacity)
+
+        self._map[self._used:self._used + len(entry)] = entry
+        position = self._used + len(entry)
+        struct.pack_into('d', self._map, position, 0.0)
+        self._used = position + 8
+        # Readers only see the entry once it is complete
+        struct.pack_into('i', self._map, 0, self._used)
+        self._positions[key] = position
+
+    def inc(self, key, amount):
+        if key not in self._positions:
+            self._add_entry(key)
+        position = self._positions[key]
+        value = struct.unpack_from('d', self._map, position)[0]
+        struct.pack_into('d', self._map, position, value + amount)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = None
+        self._owner = None
+
+    @property
+    def enabled(self):
+        return bool(settings.METRICS_DIR)
+
+    def _get_values(self):
+        # Every forked worker writes to a file of its own
+        owner = (os.getpid(), settings.METRICS_DIR)
+        if self._owner != owner:
+            os.makedirs(settings.METRICS_DIR, exist_ok=True)
+            path = os.path.join(
+                settings.METRICS_DIR, f'metrics_{os.getpid()}.db'
+            )
+            self._values = MmapedValues(path)
+            self._owner = owner
+        return self._values
+
+    def inc(self, name, labels, amount=1):
+        self._inc(name, name, labels, amount)
+
+    def observe(self, name, labels, value, buckets):
+        self._inc(name, f'{name}_sum', labels, value)
+        self._inc(name, f'{name}_count', labels, 1)
+        for bound in buckets + (float('inf'),):
+            if value <= bound:
+                bucket_labels = {**labels, 'le': format_bound(bound)}
+                self._inc(name, f'{name}_bucket', bucket_labels, 1)
+
+    def _inc(self, name, sample, labels, amount):
+        if not self.enabled:
+            return
+        key = json.dumps([name, sample, sorted(labels.items())])
+        with self._lock:
+            self._get_values().inc(key, amount)
+
+    def collect(self):
+        """Renders the sum of every worker's samples in text format"""
+        samples = defaultdict(float)
+        pattern = os.path.join(settings.METRICS_DIR, 'metrics_*.db')
+        for path in glob.glob(pattern):
+            for key, value in MmapedValues.read_file(path):
+                samples[key] += value
+
+        by_metric = defaultdict(list)
+        for key, value in samples.items():
+            name, sample, labels = json.loads(key)
+            by_metric[name].append((sample, labels, value))
+
+        lines = []
+        for name in sorted(by_metric):
+            metric_type, description = METRICS.get(name, ('untyped', ''))
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for sample, labels, value in sorted(
+                    by_metric[name], key=sample_sort_key):
+                label_text = ','.join(
+                    f'{label}="{escape(label_value)}"'
+                    for label, label_value in labels
+                )
+                lines.append(f'{sample}{{{label_text}}} {value!r}')
+        return '\n'.join(lines) + '\n'
+
+
+def format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+def escape(value):
+    return (
+        str(value).replace('\\', r'\\').replace('\n', r'\n')
+        .replace('"', r'\"')
+    )
+
+
+def sample_sort_key(entry):
+    sample, labels, _ = entry
+    labels = dict(labels)
+    bound = labels.pop('le', None)
+    bound = float('inf') if bound == '+Inf' else float(bound or 0)
+    return sample, sorted(labels.items()), bound
+
+
+registry = MetricsRegistry()
+
+
+def observe_request(endpoint, method, status, seconds):
+    if method not in HTTP_METHODS:
+        method = 'other'
+    registry.inc('http_requests_total', {
+        'endpoint': endpoint, 'method': method, 'status': str(status)
+    })
+    registry.observe(
+        'http_request_duration_seconds', {'endpoint': endpoint}, seconds,
+        REQUEST_BUCKETS
+    )
+
+
+def observe_password_hash(operation, seconds):
+    registry.observe(
+        'password_hash_duration_seconds', {'operation': operation}, seconds,
+        HASH_BUCKETS
+    )
@@ -0,0 +1,89 @@
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from . import metrics, timing
+
+logger = logging.getLogger('users.timing')
+
+# Server-Timing metric names and descriptions, in reporting order
+PHASES = [
+    ('db', 'Database'),
+    ('hash', 'Password hashing'),
+    ('jwt', 'JWT minting'),
+    ('serialize', 'Serialization'),
+]
+
+
+class ServerTimingMiddleware:
+    """Reports where each request spent its time
+
+    Database time and query count, password hashing, JWT minting and
+    serialization are added to a Server-Timing header and logged as one JSON
+    line on the users.timing logger. Phases may overlap, e.g. queries run
+    while serializing are counted in both."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings, token = timing.start()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timings.execute_wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            timing.stop(token)
+        total = time.perf_counter() - started
+
+        metrics = []
+        for name, description in PHASES:
+            if name == 'db':
+                description = f'{timings.queries} queries'
+            duration = timings.durations.get(name, 0) * 1000
+            metrics.append(
+                f'{name};desc="{description}";dur={duration:.2f}'
+            )
+        metrics.append(f'total;dur={total * 1000:.2f}')
+        response['Server-Timing'] = ', '.join(metrics)
+
+        log_data = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'db_queries': timings.queries,
+        }
+        for name, _ in PHASES:
+            log_data[f'{name}_ms'] = round(
+                timings.durations.get(name, 0) * 1000, 2
+            )
+        logger.info(json.dumps(log_data))
+
+        return response
+
+
+class MetricsMiddleware:
+    """Records request counts and latencies for the /metrics endpoint"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        endpoint = match.url_name if match and match.url_name else 'unmatched'
+        metrics.observe_request(
+            endpoint, request.method, response.status_code, duration
+        )
+        return response
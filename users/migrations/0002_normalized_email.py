@@ -0,0 +1,60 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+BATCH_SIZE = 500
+
+
+def normalize_email(email):
+    # Frozen copy of users.managers.normalize_email
+    return (email or '').strip().lower()
+
+
+def backfill_normalized_email(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+
+    # Normalized in Python, as lookups are: SQL LOWER() and TRIM() only fold
+    # ASCII letters and strip spaces. Each batch is read in full before it is
+    # written, since SQLite cursors see the rows updated under them.
+    users = User.objects.only('id', 'email').order_by('id')
+    last_id = 0
+    while True:
+        batch = list(users.filter(id__gt=last_id)[:BATCH_SIZE])
+        if not batch:
+            break
+        for user in batch:
+            user.normalized_email = normalize_email(user.email)
+        User.objects.bulk_update(batch, ['normalized_email'])
+        last_id = batch[-1].id
+
+    duplicates = list(
+        User.objects.values('normalized_email')
+        .annotate(total=Count('id')).filter(total__gt=1)
+        .values_list('normalized_email', flat=True)
+    )
+    if duplicates:
+        raise RuntimeError(
+            'These e-mails belong to more than one account when compared '
+            'case-insensitively and must be merged before migrating: '
+            + ', '.join(duplicates)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='normalized_email',
+            field=models.EmailField(editable=False, max_length=254, null=True, verbose_name='E-mail normalizado'),
+        ),
+        migrations.RunPython(backfill_normalized_email, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='user',
+            name='normalized_email',
+            field=models.EmailField(editable=False, max_length=254, unique=True, verbose_name='E-mail normalizado'),
+        ),
+    ]
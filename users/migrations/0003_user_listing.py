@@ -0,0 +1,22 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_normalized_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='is_staff',
+            field=models.BooleanField(default=False, verbose_name='Equipe'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(
+                fields=['created_at', 'id'], name='user_created_at_id_idx'
+            ),
+        ),
+    ]
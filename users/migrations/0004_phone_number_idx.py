@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_listing'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='phone',
+            index=models.Index(
+                fields=['country_code', 'area_code', 'number'],
+                name='phone_number_idx'
+            ),
+        ),
+    ]
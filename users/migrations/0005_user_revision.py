@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_phone_number_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='revision',
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name='Revisão'
+            ),
+        ),
+    ]
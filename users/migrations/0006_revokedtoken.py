@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_user_revision'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedToken',
+            fields=[
+                ('id', models.AutoField(
+                    auto_created=True, primary_key=True, serialize=False,
+                    verbose_name='ID'
+                )),
+                ('jti', models.CharField(
+                    max_length=255, unique=True, verbose_name='JTI'
+                )),
+                ('expires_at', models.DateTimeField(
+                    db_index=True, verbose_name='Expira em'
+                )),
+                ('created_at', models.DateTimeField(
+                    auto_now_add=True, verbose_name='Data de criação'
+                )),
+            ],
+        ),
+    ]
@@ -0,0 +1,56 @@
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def normalize_name(name):
+    # Frozen copy of users.managers.normalize_name
+    return (name or '').strip().lower()
+
+
+def backfill_normalized_names(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+
+    # Keyset batches, as in 0002_normalized_email
+    users = User.objects.only('id', 'first_name', 'last_name').order_by('id')
+    last_id = 0
+    while True:
+        batch = list(users.filter(id__gt=last_id)[:BATCH_SIZE])
+        if not batch:
+            break
+        for user in batch:
+            user.normalized_first_name = normalize_name(user.first_name)
+            user.normalized_last_name = normalize_name(user.last_name)
+        User.objects.bulk_update(
+            batch, ['normalized_first_name', 'normalized_last_name']
+        )
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='normalized_first_name',
+            field=models.CharField(default='', editable=False, max_length=30, verbose_name='Nome normalizado'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='normalized_last_name',
+            field=models.CharField(default='', editable=False, max_length=30, verbose_name='Sobrenome normalizado'),
+        ),
+        migrations.RunPython(backfill_normalized_names, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['normalized_first_name'], name='user_first_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['normalized_last_name'], name='user_last_name_idx'),
+        ),
+    ]
@@ -1,18 +1,38 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.db import models
+from django.db.models import F
 from django.contrib.auth.base_user import AbstractBaseUser
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 
-from .managers import UserManager
+from . import hashing
+from .buffers import last_login_buffer
+from .cache import profile_cache
+from .managers import UserManager, normalize_email, normalize_name
 
 
 class User(AbstractBaseUser):
     email = models.EmailField(_('E-mail'), unique=True)
+    normalized_email = models.EmailField(
+        _('E-mail normalizado'), unique=True, editable=False
+    )
     first_name = models.CharField(_('Nome'), max_length=30)
     last_name = models.CharField(_('Sobrenome'), max_length=30)
+    normalized_first_name = models.CharField(
+        _('Nome normalizado'), max_length=30, default='', editable=False
+    )
+    normalized_last_name = models.CharField(
+        _('Sobrenome normalizado'), max_length=30, default='', editable=False
+    )
     created_at = models.DateTimeField(_('Data de criação'), auto_now_add=True)
     last_login = models.DateTimeField(_('Último login'), auto_now_add=True)
     is_active = models.BooleanField(_('Ativo'), default=True)
+    is_staff = models.BooleanField(_('Equipe'), default=False)
+    # Bumped whenever the profile changes; part of the /me ETag
+    revision = models.PositiveIntegerField(
+        _('Revisão'), default=0, editable=False
+    )
 
     objects = UserManager()
 
@@ -20,15 +40,86 @@ class User(AbstractBaseUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
 
+    # Saving only these fields leaves the revision alone: the password is not
+    # part of the profile and last_login goes into the ETag by itself.
+    UNVERSIONED_FIELDS = {'password', 'last_login'}
+
+    class Meta:
+        indexes = [
+            # Backs the keyset pagination of the user listing
+            models.Index(
+                fields=['created_at', 'id'], name='user_created_at_id_idx'
+            ),
+            # Back the name prefix search of the user listing
+            models.Index(
+                fields=['normalized_first_name'], name='user_first_name_idx'
+            ),
+            models.Index(
+                fields=['normalized_last_name'], name='user_last_name_idx'
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.normalized_email = normalize_email(self.email)
+        self.normalized_first_name = normalize_name(self.first_name)
+        self.normalized_last_name = normalize_name(self.last_name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            # The normalized columns follow the fields they are made from
+            normalized = {
+                f'normalized_{name}' for name in update_fields
+                if name in ('email', 'first_name', 'last_name')
+            }
+            update_fields = kwargs['update_fields'] = {
+                *update_fields, *normalized
+            }
+        bump = not self._state.adding and (
+            update_fields is None
+            or not set(update_fields) <= self.UNVERSIONED_FIELDS
+        )
+        if bump:
+            # Incremented in the database, since phone changes bump it too
+            self.revision = F('revision') + 1
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'revision'}
+
+        super().save(*args, **kwargs)
+        if bump:
+            # Reloaded from the database the next time it is read
+            del self.revision
+
     def get_full_name(self):
         return f'{self.first_name} {self.last_name}'
 
     def get_short_name(self):
         return self.first_name
 
+    def set_password(self, raw_password):
+        self.password = hashing.make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        correct = hashing.check_password(raw_password, self.password)
+        if correct and hashing.must_update(self.password):
+            self.set_password(raw_password)
+            self._password = None
+            self.save(update_fields=['password'])
+        return correct
+
+    async def acheck_password(self, raw_password):
+        """check_password() awaiting the hashing pool, for the async views"""
+        correct = await hashing.acheck_password(raw_password, self.password)
+        if correct and hashing.must_update(self.password):
+            self.password = await hashing.amake_password(raw_password)
+            await sync_to_async(self.save)(update_fields=['password'])
+        return correct
+
     def update_last_login(self):
         self.last_login = timezone.now()
-        self.save()
+        if settings.LAST_LOGIN_WRITE_BEHIND:
+            last_login_buffer.record(self.pk, self.last_login)
+        else:
+            self.save(update_fields=['last_login'])
 
 
 class Phone(models.Model):
@@ -40,5 +131,36 @@ class Phone(models.Model):
         on_delete=models.CASCADE, related_name='phones'
     )
 
+    class Meta:
+        indexes = [
+            # Backs the reverse lookup of accounts by phone number
+            models.Index(
+                fields=['country_code', 'area_code', 'number'],
+                name='phone_number_idx'
+            ),
+        ]
+
     def __str__(self):
         return f'{self.country_code} {self.area_code} {self.number}'
+
+    def delete(self, *args, **kwargs):
+        # Rather than a post_delete receiver, which would keep phones from
+        # being fast-deleted. QuerySet.delete() leaves the owner untouched.
+        result = super().delete(*args, **kwargs)
+        profile_cache.invalidate(self.user_id)
+        self.bump_owner_revision()
+        return result
+
+    def bump_owner_revision(self):
+        User.objects.filter(pk=self.user_id).update(
+            revision=F('revision') + 1
+        )
+
+
+class RevokedToken(models.Model):
+    jti = models.CharField(_('JTI'), max_length=255, unique=True)
+    expires_at = models.DateTimeField(_('Expira em'), db_index=True)
+    created_at = models.DateTimeField(_('Data de criação'), auto_now_add=True)
+
+    def __str__(self):
+        return self.jti
@@ -0,0 +1,76 @@
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .managers import normalize_email, normalize_name
+
+
+def encode_cursor(user):
+    """Opaque position right after user in the (created_at, id) ordering"""
+    position = json.dumps([user.created_at.isoformat(), user.pk])
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Returns the (created_at, id) encoded in cursor
+
+    Raises ValueError when the cursor was not made by encode_cursor."""
+    try:
+        created_at, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        created_at = parse_datetime(created_at)
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError('Invalid cursor')
+
+    if created_at is None or not isinstance(pk, int):
+        raise ValueError('Invalid cursor')
+    return created_at, pk
+
+
+def search_users(queryset, email=None, name=None):
+    """Filters users by e-mail and name prefix
+
+    Each prefix is matched as a range on a normalized column, so it is
+    answered from that column's index: normalized_email for the e-mail and
+    normalized_first_name or normalized_last_name for the name."""
+    if email:
+        prefix = normalize_email(email)
+        queryset = queryset.filter(
+            normalized_email__gte=prefix,
+            normalized_email__lt=prefix + '\uffff'
+        )
+    if name:
+        prefix = normalize_name(name)
+        queryset = queryset.filter(
+            Q(
+                normalized_first_name__gte=prefix,
+                normalized_first_name__lt=prefix + '\uffff'
+            ) | Q(
+                normalized_last_name__gte=prefix,
+                normalized_last_name__lt=prefix + '\uffff'
+            )
+        )
+    return queryset
+
+
+def paginate_users(queryset, cursor=None, limit=50):
+    """Returns a page of users ordered by (created_at, id) and the next cursor
+
+    The page starts with a seek on the (created_at, id) index instead of an
+    OFFSET, so every page costs the same however deep it is. The phones of
+    the page are loaded with one extra query."""
+    queryset = queryset.order_by('created_at', 'id')
+    if cursor is not None:
+        created_at, pk = decode_cursor(cursor)
+        # The >= bound lets the database seek; the OR only breaks ties
+        queryset = queryset.filter(created_at__gte=created_at).filter(
+            Q(created_at__gt=created_at) | Q(id__gt=pk)
+        )
+
+    users = list(queryset.prefetch_related('phones')[:limit + 1])
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(users[-1])
+    return users, next_cursor
@@ -0,0 +1,120 @@
+import threading
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+# Expired entries are dropped from memory at most this often, in seconds
+PRUNE_INTERVAL = 60
+
+
+def revocation_key(jti):
+    """simplejwt jtis are UUID hex strings; they are kept as 16 raw bytes"""
+    try:
+        return bytes.fromhex(jti)
+    except (TypeError, ValueError):
+        return jti
+
+
+class RevocationList:
+    """jtis of the revoked tokens that have not expired yet, per process
+
+    Lookups are answered from memory. Revocations made by other workers are
+    read from the RevokedToken table with an id > last-seen query at most
+    every TOKEN_REVOCATION_REFRESH_INTERVAL seconds, so a token revoked
+    elsewhere may be accepted for that long."""
+
+    def __init__(self):
+        self._expires_at = None
+        self._high_water_mark = 0
+        self._refreshed_at = 0
+        self._pruned_at = 0
+        self._lock = threading.RLock()
+
+    @property
+    def enabled(self):
+        return settings.TOKEN_REVOCATION
+
+    def build(self):
+        """Loads every revocation that has not expired yet"""
+        from .models import RevokedToken
+
+        with self._lock:
+            self._expires_at = {}
+            self._high_water_mark = 0
+            self._load(RevokedToken.objects.all())
+            self._pruned_at = time.monotonic()
+
+    def refresh(self):
+        """Adds the revocations made since the last build or refresh"""
+        from .models import RevokedToken
+
+        with self._lock:
+            self._load(
+                RevokedToken.objects.filter(id__gt=self._high_water_mark)
+            )
+            if time.monotonic() - self._pruned_at >= PRUNE_INTERVAL:
+                self.prune()
+
+    def _load(self, queryset):
+        rows = queryset.filter(expires_at__gt=timezone.now()).order_by(
+            'id'
+        ).values_list('id', 'jti', 'expires_at')
+        for revocation_id, jti, expires_at in rows.iterator(chunk_size=2000):
+            self._expires_at[revocation_key(jti)] = expires_at.timestamp()
+            self._high_water_mark = revocation_id
+        self._refreshed_at = time.monotonic()
+
+    def prune(self):
+        now = time.time()
+        with self._lock:
+            self._expires_at = {
+                key: expires_at
+                for key, expires_at in self._expires_at.items()
+                if expires_at > now
+            }
+            self._pruned_at = time.monotonic()
+
+    def revoke(self, jti, expires_at):
+        """Records the revocation of a token until its expiry
+
+        expires_at is the token's exp claim, as a Unix timestamp. Returns
+        False when the token had already been revoked, possibly by another
+        worker whose revocation this process hasn't picked up yet."""
+        from .models import RevokedToken
+
+        expires_at = datetime.fromtimestamp(expires_at, tz=timezone.utc)
+        _, created = RevokedToken.objects.get_or_create(
+            jti=jti, defaults={'expires_at': expires_at}
+        )
+        # Revocations are rare, so expired rows are cleaned up here
+        RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+
+        with self._lock:
+            if self._expires_at is not None:
+                self._expires_at[revocation_key(jti)] = expires_at.timestamp()
+        return created
+
+    def is_revoked(self, jti):
+        if not self.enabled:
+            return False
+
+        if self._expires_at is None:
+            with self._lock:
+                if self._expires_at is None:
+                    self.build()
+
+        interval = settings.TOKEN_REVOCATION_REFRESH_INTERVAL
+        if time.monotonic() - self._refreshed_at >= interval:
+            self.refresh()
+
+        expires_at = self._expires_at.get(revocation_key(jti))
+        return expires_at is not None and expires_at > time.time()
+
+    def clear(self):
+        with self._lock:
+            self._expires_at = None
+
+
+revocation_list = RevocationList()
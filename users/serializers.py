@@ -1,11 +1,20 @@
-from django.core.validators import EmailValidator
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
 
+from . import timing
+from .bloom import email_index
 from .constants import (
-    MISSING_FIELD_ERROR, EMAIL_ALREADY_REGISTERED_ERROR, INVALID_LOGIN_ERROR
+    MISSING_FIELD_ERROR, EMAIL_ALREADY_REGISTERED_ERROR, INVALID_LOGIN_ERROR,
+    BULK_BATCH_SIZE, DATETIME_FORMAT
 )
+from .hashing import make_passwords
+from .managers import normalize_email, normalize_name
 from .models import User, Phone
-from .utils import get_token_for_user, format_data
+from .utils import (
+    get_token_for_user, get_refresh_token_for_user, get_error_message, chunks
+)
 
 
 class PhoneSerializer(serializers.ModelSerializer):
@@ -46,27 +55,43 @@ class UserModelSerializer(serializers.ModelSerializer):
         max_length=255, write_only=True, required=False, allow_blank=True
     )
     created_at = serializers.DateTimeField(
-        required=False, format='%Y-%m-%dT%H:%M:%S%f%z'
+        required=False, format=DATETIME_FORMAT
     )
     last_login = serializers.DateTimeField(
-        required=False, format='%Y-%m-%dT%H:%M:%S%f%z'
+        required=False, format=DATETIME_FORMAT
     )
     phones = PhoneSerializer(many=True, required=False)
 
     class Meta:
         model = User
-        exclude = ['id', 'is_active']
+        exclude = [
+            'id', 'is_active', 'is_staff', 'normalized_email',
+            'normalized_first_name', 'normalized_last_name', 'revision'
+        ]
         read_only_fields = ['created_at', 'last_login']
 
     def create(self, validated_data):
         phones = validated_data.pop('phones', [])
         password = validated_data.pop('password')
-        user = User.objects.create(**validated_data)
-        user.set_password(password)
-        user.save()
+        # The async signup view hashes the password before saving
+        encoded_password = validated_data.pop('encoded_password', None)
+        user = User(**validated_data)
+        if encoded_password:
+            user.password = encoded_password
+        else:
+            user.set_password(password)
 
-        for phone in phones:
-            Phone.objects.create(user=user, **phone)
+        try:
+            with transaction.atomic():
+                user.save()
+                # Inserted without signals: a new user has no revision to
+                # bump nor cached profile to invalidate.
+                Phone.objects.bulk_create([
+                    Phone(user=user, **phone) for phone in phones
+                ])
+        except IntegrityError:
+            # Registered since validate() ran, or missed by a stale index
+            raise serializers.ValidationError(EMAIL_ALREADY_REGISTERED_ERROR)
 
         return user
 
@@ -83,25 +108,171 @@ class UserModelSerializer(serializers.ModelSerializer):
         if not (first_name and last_name and email and password and phones):
             raise serializers.ValidationError(MISSING_FIELD_ERROR)
 
-        if User.objects.filter(email=email).exists():
+        # The bulk signup path checks every e-mail of the batch at once
+        bulk = self.context.get('bulk', False)
+        if (not bulk and email_index.might_exist(email)
+                and User.objects.filter_by_email(email).exists()):
             raise serializers.ValidationError(EMAIL_ALREADY_REGISTERED_ERROR)
 
         return data
 
 
+def format_datetime(value):
+    if value is None:
+        return None
+    return timezone.localtime(value).strftime(DATETIME_FORMAT)
+
+
+class UserFastSerializer:
+    """Renders a User and its phones straight into the response shape
+
+    Builds the same dict as format_data(UserModelSerializer(user).data)
+    without instantiating DRF fields on every response."""
+
+    def __init__(self, instance):
+        self.instance = instance
+
+    @property
+    def data(self):
+        with timing.phase('serialize'):
+            return self.to_representation(self.instance)
+
+    def to_representation(self, user):
+        return {
+            'email': user.email,
+            'created_at': format_datetime(user.created_at),
+            'last_login': format_datetime(user.last_login),
+            'phones': [
+                {
+                    'number': phone.number,
+                    'area_code': phone.area_code,
+                    'country_code': phone.country_code
+                }
+                for phone in user.phones.all()
+            ],
+            'firstName': user.first_name,
+            'lastName': user.last_name,
+        }
+
+
+def bulk_create_users(users_data, passwords=None):
+    """Creates users and their phones with batched inserts
+
+    passwords holds the encoded password of each user, in order; when omitted
+    the raw passwords are hashed in parallel. Every row is written inside a
+    single transaction. Returns the created users."""
+    if passwords is None:
+        passwords = make_passwords(data['password'] for data in users_data)
+    users = []
+    for data, password in zip(users_data, passwords):
+        fields = {
+            key: value for key, value in data.items()
+            if key not in ('password', 'phones')
+        }
+        users.append(User(
+            password=password,
+            normalized_email=normalize_email(fields['email']),
+            normalized_first_name=normalize_name(fields.get('first_name')),
+            normalized_last_name=normalize_name(fields.get('last_name')),
+            **fields
+        ))
+
+    with transaction.atomic():
+        User.objects.bulk_create(users, batch_size=BULK_BATCH_SIZE)
+
+        # Backends that can't return primary keys from a bulk insert (SQLite)
+        # need the ids fetched back before the phones can reference them.
+        if any(user.pk is None for user in users):
+            ids = {}
+            emails = [user.normalized_email for user in users]
+            for batch in chunks(emails, BULK_BATCH_SIZE):
+                ids.update(
+                    User.objects.filter(normalized_email__in=batch)
+                    .values_list('normalized_email', 'id')
+                )
+            for user in users:
+                user.pk = ids[user.normalized_email]
+
+        phones = [
+            Phone(user=user, **phone)
+            for user, data in zip(users, users_data)
+            for phone in data.get('phones', [])
+        ]
+        Phone.objects.bulk_create(phones, batch_size=BULK_BATCH_SIZE)
+
+    for user in users:
+        email_index.add(user.normalized_email)
+
+    return users
+
+
+def bulk_signup(payloads):
+    """Validates and creates a batch of users
+
+    Returns one result per payload, in order: the created User or the error
+    message explaining why the payload was rejected."""
+    results = [None] * len(payloads)
+    accepted = {}
+    for index, payload in enumerate(payloads):
+        serializer = UserModelSerializer(data=payload, context={'bulk': True})
+        if serializer.is_valid():
+            accepted[index] = serializer.validated_data
+        else:
+            results[index] = get_error_message(serializer.errors)
+
+    emails = [normalize_email(data['email']) for data in accepted.values()]
+    registered = set()
+    for batch in chunks(emails, BULK_BATCH_SIZE):
+        registered.update(
+            User.objects.filter(normalized_email__in=batch)
+            .values_list('normalized_email', flat=True)
+        )
+
+    pending = {}
+    for (index, data), email in zip(accepted.items(), emails):
+        if email in registered:
+            results[index] = EMAIL_ALREADY_REGISTERED_ERROR
+            continue
+        registered.add(email)
+        pending[index] = data
+
+    created = {}
+    if pending:
+        users_data = list(pending.values())
+        passwords = make_passwords(data['password'] for data in users_data)
+        try:
+            created = dict(
+                zip(pending, bulk_create_users(users_data, passwords))
+            )
+        except IntegrityError:
+            # Someone registered one of these e-mails since the check: insert
+            # the users one by one so only the conflicts are rejected
+            for index, data, password in zip(pending, users_data, passwords):
+                try:
+                    [created[index]] = bulk_create_users([data], [password])
+                except IntegrityError:
+                    results[index] = EMAIL_ALREADY_REGISTERED_ERROR
+
+    prefetch_related_objects(list(created.values()), 'phones')
+    for index, user in created.items():
+        results[index] = user
+
+    return results
+
+
 class UserLoginSerializer(serializers.Serializer):
     email = serializers.EmailField(required=False)
     password = serializers.CharField(max_length=128, required=False)
 
     def create(self, validated_data):
-        email = validated_data.get('email')
-        user = User.objects.get(email=email)
+        user = validated_data.get('user')
+        prefetch_related_objects([user], 'phones')
         user.update_last_login()
 
-        user_serializer = UserModelSerializer(user)
         response_data = {
-            'user': format_data(user_serializer.data),
-            'token': get_token_for_user(user)
+            'user': UserFastSerializer(user).data,
+            'token': get_token_for_user(user),
+            'refreshToken': get_refresh_token_for_user(user)
         }
 
         return response_data
@@ -113,11 +284,12 @@ class UserLoginSerializer(serializers.Serializer):
         if not (email and password):
             raise serializers.ValidationError(MISSING_FIELD_ERROR)
 
-        if not User.objects.filter(email=email).exists():
+        user = None
+        if email_index.might_exist(email):
+            user = User.objects.filter_by_email(email).first()
+        if user is None or not user.check_password(password):
             raise serializers.ValidationError(INVALID_LOGIN_ERROR)
 
-        user = User.objects.get(email=email)
-        if not user.check_password(password):
-            raise serializers.ValidationError(INVALID_LOGIN_ERROR)
+        data['user'] = user
 
         return data
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .bloom import email_index
+from .cache import profile_cache
+from .models import User, Phone
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_profile(sender, instance, **kwargs):
+    profile_cache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def index_user_email(sender, instance, created, **kwargs):
+    if created:
+        email_index.add(instance.normalized_email)
+
+
+# Phone deletions are handled by Phone.delete(): a delete receiver would keep
+# the phones of a deleted user from being removed with a single DELETE.
+@receiver(post_save, sender=Phone)
+def invalidate_phone_owner_profile(sender, instance, **kwargs):
+    profile_cache.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Phone)
+def bump_phone_owner_revision(sender, instance, **kwargs):
+    instance.bump_owner_revision()
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+        return
+
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
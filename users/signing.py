@@ -0,0 +1,204 @@
+"""Asymmetric token signing with key ids and a published JSON Web Key Set
+
+With JWT_ALGORITHM set to an asymmetric algorithm, install_token_backend()
+replaces simplejwt's token backend with a KeyIdTokenBackend. Other services
+can then verify tokens with the public keys served at /.well-known/jwks.json
+instead of calling /me. Needs the cryptography package."""
+import base64
+import hashlib
+import json
+
+import jwt
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from jwt import InvalidTokenError
+from rest_framework_simplejwt import state
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.exceptions import TokenBackendError
+from rest_framework_simplejwt.settings import api_settings
+
+try:
+    from cryptography.exceptions import UnsupportedAlgorithm
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+except ImportError:
+    serialization = None
+
+RSA_ALGORITHMS = ['RS256', 'RS384', 'RS512']
+ASYMMETRIC_ALGORITHMS = RSA_ALGORITHMS + ['EdDSA']
+
+
+def base64url(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def base64url_uint(value):
+    return base64url(value.to_bytes((value.bit_length() + 7) // 8, 'big'))
+
+
+def public_jwk(public_key):
+    """Members of the JWK of a public key, as listed in RFC 7638"""
+    if isinstance(public_key, rsa.RSAPublicKey):
+        numbers = public_key.public_numbers()
+        return {
+            'e': base64url_uint(numbers.e),
+            'kty': 'RSA',
+            'n': base64url_uint(numbers.n),
+        }
+    if isinstance(public_key, ed25519.Ed25519PublicKey):
+        raw = public_key.public_bytes(
+            serialization.Encoding.Raw, serialization.PublicFormat.Raw
+        )
+        return {'crv': 'Ed25519', 'kty': 'OKP', 'x': base64url(raw)}
+    raise ImproperlyConfigured('Only RSA and Ed25519 keys are supported.')
+
+
+def key_thumbprint(public_key):
+    """RFC 7638 thumbprint of a public key, used as its default key id"""
+    members = json.dumps(
+        public_jwk(public_key), sort_keys=True, separators=(',', ':')
+    )
+    return base64url(hashlib.sha256(members.encode()).digest())
+
+
+class KeyIdTokenBackend(TokenBackend):
+    """Signs tokens with a private key and names it in the kid header
+
+    Key ids are RFC 7638 thumbprints. Tokens are verified with the public key
+    their kid names, so tokens signed with a retired key stay valid while
+    that key is still configured. Keys are parsed once, when the backend is
+    built."""
+
+    def __init__(self, algorithm, signing_key, key_id, verifying_keys,
+                 audience=None, issuer=None):
+        # TokenBackend.__init__ rejects algorithms other than HS* and RS*
+        self.algorithm = algorithm
+        self.signing_key = signing_key
+        self.key_id = key_id
+        self.verifying_keys = verifying_keys
+        self.verifying_key = verifying_keys[key_id]
+        self.audience = audience
+        self.issuer = issuer
+        self.jwks = {
+            'keys': [
+                {
+                    **public_jwk(public_key),
+                    'kid': kid,
+                    'alg': algorithm,
+                    'use': 'sig',
+                }
+                for kid, public_key in verifying_keys.items()
+            ]
+        }
+
+    def encode(self, payload):
+        jwt_payload = payload.copy()
+        if self.audience is not None:
+            jwt_payload['aud'] = self.audience
+        if self.issuer is not None:
+            jwt_payload['iss'] = self.issuer
+
+        return jwt.encode(
+            jwt_payload, self.signing_key, algorithm=self.algorithm,
+            headers={'kid': self.key_id}
+        )
+
+    def decode(self, token, verify=True):
+        try:
+            kid = jwt.get_unverified_header(token).get('kid')
+            verifying_key = self.verifying_keys.get(kid)
+            if verifying_key is None:
+                raise InvalidTokenError('Unknown key id')
+
+            return jwt.decode(
+                token, verifying_key, algorithms=[self.algorithm],
+                audience=self.audience, issuer=self.issuer,
+                options={
+                    'verify_signature': verify,
+                    'verify_aud': self.audience is not None
+                }
+            )
+        except InvalidTokenError:
+            raise TokenBackendError('Token is invalid or expired')
+
+
+def read_key(path, private=False):
+    try:
+        with open(path, 'rb') as key_file:
+            data = key_file.read()
+    except OSError as error:
+        raise ImproperlyConfigured(f'Cannot read JWT key {path}: {error}')
+
+    try:
+        if private:
+            return serialization.load_pem_private_key(data, password=None)
+        return serialization.load_pem_public_key(data)
+    except (ValueError, TypeError, UnsupportedAlgorithm) as error:
+        raise ImproperlyConfigured(f'Cannot parse JWT key {path}: {error}')
+
+
+def check_key_type(algorithm, public_key, path):
+    """Rejects keys that can't sign or verify tokens with algorithm"""
+    if algorithm in RSA_ALGORITHMS:
+        key_type = rsa.RSAPublicKey
+    else:
+        key_type = ed25519.Ed25519PublicKey
+    if not isinstance(public_key, key_type):
+        raise ImproperlyConfigured(
+            f'JWT key {path} does not match JWT_ALGORITHM {algorithm}.'
+        )
+
+
+def load_token_backend():
+    """Builds a KeyIdTokenBackend from the JWT_* settings"""
+    algorithm = settings.JWT_ALGORITHM
+    if algorithm not in ASYMMETRIC_ALGORITHMS:
+        raise ImproperlyConfigured(
+            f"Unsupported JWT_ALGORITHM '{algorithm}'. Use HS256 or one of "
+            + ', '.join(ASYMMETRIC_ALGORITHMS) + '.'
+        )
+    if serialization is None:
+        raise ImproperlyConfigured(
+            'Install the cryptography package to sign tokens with '
+            f'{algorithm}.'
+        )
+    if not settings.JWT_PRIVATE_KEY_FILE:
+        raise ImproperlyConfigured(
+            'JWT_PRIVATE_KEY_FILE is required to sign tokens with '
+            f'{algorithm}.'
+        )
+
+    signing_key = read_key(settings.JWT_PRIVATE_KEY_FILE, private=True)
+    check_key_type(
+        algorithm, signing_key.public_key(), settings.JWT_PRIVATE_KEY_FILE
+    )
+    key_id = key_thumbprint(signing_key.public_key())
+    verifying_keys = {key_id: signing_key.public_key()}
+    for path in settings.JWT_PUBLIC_KEY_FILES:
+        public_key = read_key(path)
+        check_key_type(algorithm, public_key, path)
+        verifying_keys.setdefault(key_thumbprint(public_key), public_key)
+
+    return KeyIdTokenBackend(
+        algorithm, signing_key, key_id, verifying_keys,
+        api_settings.AUDIENCE, api_settings.ISSUER
+    )
+
+
+def install_token_backend():
+    """Makes simplejwt sign and verify with the configured key pair
+
+    simplejwt's tokens look up state.token_backend on every use, so replacing
+    it once at startup is enough. HS256 keeps the stock backend. Tokens
+    verified with the previous keys are dropped from the token cache."""
+    from .cache import token_cache
+
+    if settings.JWT_ALGORITHM == 'HS256':
+        return
+    state.token_backend = load_token_backend()
+    token_cache.clear()
+
+
+def get_jwks():
+    """Public keys that verify this app's tokens, or None with HS256"""
+    return getattr(state.token_backend, 'jwks', None)
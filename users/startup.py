@@ -0,0 +1,77 @@
+"""Startup profiling helpers for the profile_startup command
+
+probe() runs in a fresh interpreter, so this module imports nothing from
+Django or the project at import time."""
+import importlib
+import json
+import sys
+import time
+
+
+def probe(module):
+    """Imports module, timing every AppConfig.ready() along the way
+
+    Prints a JSON object with the ready() durations and the total import time
+    of module, in seconds, to stdout."""
+    from django.apps import AppConfig
+
+    ready_durations = {}
+    create = AppConfig.create.__func__
+
+    def timed_create(cls, entry):
+        app_config = create(cls, entry)
+        ready = app_config.ready
+
+        def timed_ready():
+            started = time.perf_counter()
+            ready()
+            ready_durations[app_config.name] = time.perf_counter() - started
+
+        app_config.ready = timed_ready
+        return app_config
+
+    AppConfig.create = classmethod(timed_create)
+
+    started = time.perf_counter()
+    importlib.import_module(module)
+    total = time.perf_counter() - started
+    json.dump({'ready': ready_durations, 'import': total}, sys.stdout)
+
+
+class ImportNode:
+    def __init__(self, name, self_time, cumulative):
+        self.name = name
+        self.self_time = self_time
+        self.cumulative = cumulative
+        self.children = []
+
+
+def parse_importtime(output):
+    """Builds the import tree from the stderr of python -X importtime
+
+    Returns the top-level imports. Times are in microseconds. Children are
+    reported before their parent and indented two spaces deeper."""
+    pending = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        columns = line[len('import time:'):].split('|')
+        if len(columns) != 3 or not columns[0].strip().isdigit():
+            continue
+
+        name = columns[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        node = ImportNode(
+            name.strip(), int(columns[0]), int(columns[1])
+        )
+        while pending and pending[-1][0] > depth:
+            node.children.insert(0, pending.pop()[1])
+        pending.append((depth, node))
+
+    return [node for _, node in pending]
+
+
+def walk(nodes):
+    for node in nodes:
+        yield node
+        yield from walk(node.children)
@@ -0,0 +1,55 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from model_bakery import baker
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from users.authentication import UserJWTAuthentication
+from users.cache import token_cache
+from users.models import User
+from users.utils import get_token_for_user
+
+
+class UserJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        self.user = baker.make(User)
+        self.token = get_token_for_user(self.user)
+        token_cache.clear()
+
+    def tearDown(self):
+        token_cache.clear()
+
+    def test_repeated_token_skips_verification(self):
+        """Checks a token already validated is not verified again"""
+        verify = mock.patch.object(
+            JWTAuthentication, 'get_validated_token',
+            wraps=JWTAuthentication().get_validated_token
+        )
+        with verify as get_validated_token:
+            first = UserJWTAuthentication().get_validated_token(self.token)
+            second = UserJWTAuthentication().get_validated_token(self.token)
+
+        self.assertEqual(get_validated_token.call_count, 1)
+        self.assertEqual(first['user_id'], self.user.id)
+        self.assertIs(first, second)
+
+    def test_expired_entry_is_verified_again(self):
+        """Checks cached tokens are dropped once their exp claim passes"""
+        authentication = UserJWTAuthentication()
+        validated_token = authentication.get_validated_token(self.token)
+
+        exp = validated_token['exp']
+        with mock.patch('users.cache.time.time', return_value=exp):
+            key = next(iter(token_cache._entries))
+            self.assertIsNone(token_cache.get(key))
+
+    @override_settings(JWT_VERIFIED_TOKEN_CACHE_SIZE=1)
+    def test_cache_size(self):
+        """Checks the least recently used token is evicted"""
+        other_token = get_token_for_user(baker.make(User))
+        authentication = UserJWTAuthentication()
+        authentication.get_validated_token(self.token)
+        authentication.get_validated_token(other_token)
+
+        self.assertEqual(len(token_cache._entries), 1)
@@ -0,0 +1,115 @@
+import threading
+
+from django.test import TestCase, override_settings
+
+from model_bakery import baker
+from rest_framework.exceptions import ValidationError
+
+from users.bloom import BloomFilter, email_index
+from users.models import User
+from users.serializers import UserLoginSerializer, UserModelSerializer
+
+
+class BloomFilterTests(TestCase):
+    def test_no_false_negatives(self):
+        """Checks every added item is reported as present"""
+        bloom_filter = BloomFilter(1000, 0.01)
+        items = [f'user{n}@tester.com' for n in range(1000)]
+        for item in items:
+            bloom_filter.add(item)
+
+        for item in items:
+            self.assertIn(item, bloom_filter)
+
+    def test_false_positive_rate(self):
+        """Checks the false positive rate stays close to the configured one"""
+        bloom_filter = BloomFilter(1000, 0.01)
+        for n in range(1000):
+            bloom_filter.add(f'user{n}@tester.com')
+
+        false_positives = sum(
+            f'other{n}@tester.com' in bloom_filter for n in range(10000)
+        )
+        self.assertLess(false_positives, 300)
+
+
+@override_settings(EMAIL_BLOOM_FILTER=True, EMAIL_BLOOM_REFRESH_INTERVAL=60)
+class EmailIndexTests(TestCase):
+    def setUp(self):
+        self.user = baker.make(User, email='User@Tester.com')
+        self.user.set_password('test')
+        self.user.save()
+        email_index.build()
+
+    def tearDown(self):
+        email_index.clear()
+
+    def test_unknown_email_skips_database(self):
+        """Checks a signin with an unknown e-mail runs no query"""
+        data = {'email': 'unknown@tester.com', 'password': 'test'}
+        with self.assertNumQueries(0):
+            serializer = UserLoginSerializer(data=data)
+            self.assertFalse(serializer.is_valid())
+
+    def test_new_users_are_indexed(self):
+        """Checks users saved after the build are found"""
+        baker.make(User, email='new@tester.com')
+
+        self.assertTrue(email_index.might_exist('NEW@tester.com'))
+        self.assertTrue(email_index.might_exist('user@tester.com'))
+
+    def test_refresh_picks_up_other_workers(self):
+        """Checks a stale negative is refreshed from the database
+
+        Rows inserted without signals stand in for signups served by another
+        worker."""
+        User.objects.bulk_create([
+            User(email='other@tester.com', normalized_email='other@tester.com')
+        ])
+
+        with override_settings(EMAIL_BLOOM_REFRESH_INTERVAL=0):
+            self.assertTrue(email_index.might_exist('other@tester.com'))
+
+    def test_stale_negative_signup_is_rejected(self):
+        """Checks the unique index rejects a duplicate the filter missed"""
+        User.objects.bulk_create([
+            User(email='other@tester.com', normalized_email='other@tester.com')
+        ])
+        data = {
+            'email': 'other@tester.com',
+            'first_name': 'User',
+            'last_name': 'Tester',
+            'password': 'test',
+            'phones': [
+                {'number': 987465489, 'area_code': 81, 'country_code': '+55'}
+            ]
+        }
+        serializer = UserModelSerializer(data=data)
+        self.assertTrue(serializer.is_valid())
+
+        with self.assertRaises(ValidationError):
+            serializer.save()
+
+    def test_lookups_skip_index_while_built(self):
+        """Checks requests don't wait for another thread's build"""
+        email_index.clear()
+        building = threading.Event()
+        done = threading.Event()
+
+        def build():
+            with email_index._lock:
+                building.set()
+                done.wait()
+
+        builder = threading.Thread(target=build)
+        builder.start()
+        building.wait()
+        try:
+            self.assertTrue(
+                email_index.might_exist('unknown@tester.com'),
+                msg="""Lookups during a build should fall back
+                to the database"""
+            )
+        finally:
+            done.set()
+            builder.join()
@@ -0,0 +1,44 @@
+import csv
+import io
+import json
+
+from django.test import TestCase
+
+from model_bakery import baker
+
+from users.exports import export_users
+from users.models import User, Phone
+from users.serializers import UserModelSerializer
+from users.utils import format_data
+
+
+class ExportUsersTests(TestCase):
+    def setUp(self):
+        self.users = baker.make(User, _quantity=5)
+        for user in self.users:
+            baker.make(Phone, user=user, _quantity=2)
+
+    def test_export_ndjson(self):
+        """Checks every user is exported in the API response shape"""
+        stream = io.StringIO()
+        with self.assertNumQueries(4):
+            count = export_users(stream, 'ndjson', chunk_size=2)
+
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(count, 5)
+        self.assertEqual(len(lines), 5)
+        for user, line in zip(self.users, lines):
+            expected = json.loads(
+                json.dumps(format_data(UserModelSerializer(user).data))
+            )
+            self.assertEqual(json.loads(line), expected)
+
+    def test_export_csv(self):
+        """Checks the CSV export has a header and one row per user"""
+        stream = io.StringIO()
+        export_users(stream, 'csv')
+
+        rows = list(csv.DictReader(io.StringIO(stream.getvalue())))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['email'], self.users[0].email)
+        self.assertEqual(len(json.loads(rows[0]['phones'])), 2)
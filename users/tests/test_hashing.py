@@ -0,0 +1,57 @@
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password
+from django.test import TestCase, override_settings
+
+from model_bakery import baker
+
+from users import hashing
+from users.models import User
+
+
+@override_settings(PASSWORD_HASHING_EXECUTOR='thread')
+class HashingExecutorTests(TestCase):
+    def setUp(self):
+        self.password = 'test'
+        self.user = baker.make(User)
+
+    def test_set_password(self):
+        """Checks set_password() hashes on the request thread"""
+        with mock.patch.object(hashing, 'get_executor') as get_executor:
+            self.user.set_password(self.password)
+
+        get_executor.assert_not_called()
+        self.assertTrue(
+            check_password(self.password, self.user.password),
+            msg="""set_password() stored a hash that does not match the
+            password."""
+        )
+
+    def test_check_password(self):
+        """Checks check_password() with a hashing pool configured"""
+        self.user.set_password(self.password)
+
+        self.assertTrue(self.user.check_password(self.password))
+        self.assertFalse(self.user.check_password('wrong'))
+
+    async def test_acheck_password(self):
+        """Checks acheck_password() verifies without blocking the loop"""
+        encoded = await hashing.amake_password(self.password)
+
+        self.assertTrue(await hashing.acheck_password(self.password, encoded))
+        self.assertFalse(await hashing.acheck_password('wrong', encoded))
+
+    async def test_user_acheck_password_upgrades_hash(self):
+        """Checks async password checks rehash outdated hashes as sync ones"""
+        self.user.password = PBKDF2PasswordHasher().encode(
+            self.password, 'salt', iterations=1000
+        )
+
+        self.assertTrue(await self.user.acheck_password(self.password))
+        user = await sync_to_async(User.objects.get)(pk=self.user.pk)
+        self.assertFalse(
+            hashing.must_update(user.password),
+            msg="""The password should be stored with the
+            current iterations after an async signin"""
+        )
@@ -0,0 +1,121 @@
+import io
+import json
+
+from django.contrib.auth.hashers import make_password
+from django.test import TestCase
+
+from model_bakery import baker
+
+from users.constants import (
+    MISSING_FIELD_ERROR, EMAIL_ALREADY_REGISTERED_ERROR,
+    INVALID_IMPORT_ROW_ERROR, INVALID_PASSWORD_HASH_ERROR
+)
+from users.imports import UserImporter, read_ndjson, read_csv
+from users.models import User
+
+
+def make_row(email, password, **extra):
+    row = {
+        'firstName': 'Hello',
+        'lastName': 'World',
+        'email': email,
+        'password': password,
+        'phones': [
+            {'number': 988887888, 'area_code': 81, 'country_code': '+55'}
+        ]
+    }
+    row.update(extra)
+    return row
+
+
+class UserImporterTests(TestCase):
+    def setUp(self):
+        self.encoded = make_password('hunter2')
+        baker.make(User, email='taken@test.com')
+
+    def import_ndjson(self, lines, **kwargs):
+        failures = []
+        importer = UserImporter(
+            on_failure=lambda line, message: failures.append((line, message)),
+            **kwargs
+        )
+        result = importer.run(read_ndjson(io.StringIO('\n'.join(lines))))
+        return result, failures
+
+    def test_import_reports_failures_without_stopping(self):
+        """Checks bad rows are reported by line while the others are created"""
+        lines = [
+            json.dumps(make_row('first@test.com', self.encoded)),
+            'not json',
+            json.dumps(make_row('second@test.com', self.encoded, phones=[])),
+            json.dumps(make_row('TAKEN@test.com', self.encoded)),
+            json.dumps(make_row('third@test.com', 'plain-password')),
+            json.dumps(make_row('First@test.com', self.encoded)),
+        ]
+        (created, failed), failures = self.import_ndjson(lines, batch_size=4)
+
+        self.assertEqual(created, 2)
+        self.assertEqual(failed, 4)
+        self.assertEqual(failures, [
+            (2, INVALID_IMPORT_ROW_ERROR),
+            (3, MISSING_FIELD_ERROR),
+            (4, EMAIL_ALREADY_REGISTERED_ERROR),
+            (6, EMAIL_ALREADY_REGISTERED_ERROR),
+        ])
+
+        first = User.objects.get(email='first@test.com')
+        third = User.objects.get(email='third@test.com')
+        self.assertEqual(
+            first.password, self.encoded,
+            msg="""Pre-hashed passwords should be stored as given"""
+        )
+        self.assertTrue(
+            third.check_password('plain-password'),
+            msg="""Plaintext passwords should be hashed"""
+        )
+        self.assertEqual(third.phones.count(), 1)
+
+    def test_import_conflict_fails_only_its_row(self):
+        """Checks a batch with a late conflict still creates the other rows
+
+        A stale normalized e-mail stands in for a user registered between
+        the duplicate check and the insert."""
+        User.objects.filter(email='taken@test.com').update(
+            normalized_email='stale@test.com'
+        )
+        lines = [
+            json.dumps(make_row('first@test.com', self.encoded)),
+            json.dumps(make_row('taken@test.com', self.encoded)),
+            json.dumps(make_row('second@test.com', self.encoded)),
+        ]
+        (created, failed), failures = self.import_ndjson(lines)
+
+        self.assertEqual((created, failed), (2, 1))
+        self.assertEqual(failures, [(2, EMAIL_ALREADY_REGISTERED_ERROR)])
+        self.assertEqual(
+            User.objects.get(email='second@test.com').phones.count(), 1
+        )
+
+    def test_import_hashed_passwords_only(self):
+        """Checks plaintext passwords are rejected when hashes are required"""
+        lines = [json.dumps(make_row('plain@test.com', 'plain-password'))]
+        (created, failed), failures = self.import_ndjson(
+            lines, password_format='hashed'
+        )
+
+        self.assertEqual((created, failed), (0, 1))
+        self.assertEqual(failures, [(1, INVALID_PASSWORD_HASH_ERROR)])
+
+    def test_import_csv(self):
+        """Checks CSV rows with phones encoded as JSON are imported"""
+        phones = json.dumps(make_row('', '')['phones']).replace('"', '""')
+        stream = io.StringIO(
+            'email,firstName,lastName,password,phones\n'
+            f'csv@test.com,Hello,World,{self.encoded},"{phones}"\n'
+        )
+        created, failed = UserImporter().run(read_csv(stream))
+
+        self.assertEqual((created, failed), (1, 0))
+        user = User.objects.get(email='csv@test.com')
+        self.assertEqual(user.first_name, 'Hello')
+        self.assertEqual(user.phones.get().area_code, 81)
@@ -0,0 +1,127 @@
+import os
+import tempfile
+
+from django.test import TestCase, modify_settings, override_settings
+from django.urls import reverse
+
+from model_bakery import baker
+
+from users.metrics import MmapedValues, registry
+from users.models import User
+
+
+class MmapedValuesTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'metrics_1.db')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_values_persist_in_file(self):
+        """Checks values written by MmapedValues are read back from disk"""
+        values = MmapedValues(self.path)
+        values.inc('a', 1)
+        values.inc('a', 2.5)
+        values.inc('key with an odd length', 1)
+
+        self.assertEqual(
+            dict(MmapedValues.read_file(self.path)),
+            {'a': 3.5, 'key with an odd length': 1.0}
+        )
+
+        reopened = MmapedValues(self.path)
+        reopened.inc('a', 1)
+        self.assertEqual(dict(MmapedValues.read_file(self.path))['a'], 4.5)
+
+    def test_file_grows(self):
+        """Checks MmapedValues grows the file when it runs out of space"""
+        values = MmapedValues(self.path)
+        keys = [f'{n:0>5000}' for n in range(300)]
+        for key in keys:
+            values.inc(key, 1)
+
+        self.assertEqual(len(dict(MmapedValues.read_file(self.path))), 300)
+
+
+@modify_settings(MIDDLEWARE={'prepend': 'users.middleware.MetricsMiddleware'})
+class MetricsViewTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        settings_override = override_settings(
+            METRICS_DIR=self.directory.name, METRICS_TOKEN='scraper'
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(self.directory.cleanup)
+
+        user = baker.make(User, email='user@tester.com')
+        user.set_password('test')
+        user.save()
+
+    def test_metrics_aggregate_workers(self):
+        """Checks /metrics sums the samples written by every worker"""
+        data = {'email': 'user@tester.com', 'password': 'wrong'}
+        self.client.post(reverse('signin'), data, 'application/json')
+
+        # Another worker wrote to its own file in the same directory
+        samples = registry._get_values()._positions
+        other_worker = MmapedValues(
+            os.path.join(self.directory.name, 'metrics_999999.db')
+        )
+        for sample in samples:
+            if '"http_requests_total"' in sample:
+                other_worker.inc(sample, 2)
+
+        response = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer scraper'
+        )
+        content = response.content.decode()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'http_requests_total{endpoint="signin",method="POST",'
+            'status="400"} 3.0',
+            content
+        )
+        self.assertIn('# TYPE http_request_duration_seconds histogram',
+                      content)
+        self.assertIn(
+            'password_hash_duration_seconds_count{operation="check"}',
+            content
+        )
+
+    @override_settings(METRICS_DIR='')
+    def test_metrics_disabled(self):
+        """Checks /metrics is not served without METRICS_DIR"""
+        response = self.client.get(reverse('metrics'))
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_metrics_require_token(self):
+        """Checks /metrics is not served to anonymous clients"""
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 401)
+
+        response = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong'
+        )
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_metrics_without_token(self):
+        """Checks /metrics is not served until a token is configured"""
+        response = self.client.get(reverse('metrics'))
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_unknown_methods_share_a_label(self):
+        """Checks made-up HTTP methods don't add samples"""
+        for method in ('FOO1', 'FOO2'):
+            self.client.generic(method, reverse('signin'))
+
+        samples = registry._get_values()._positions
+        self.assertFalse([sample for sample in samples if 'FOO' in sample])
+        self.assertTrue(
+            [sample for sample in samples if '["method", "other"]' in sample]
+        )
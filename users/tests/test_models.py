@@ -1,9 +1,20 @@
-from django.test import TestCase
+from importlib import import_module
+
+from django.apps import apps
+from django.db import connection
+from django.db.models.functions import Lower, Trim
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from model_bakery import baker
 
-from users.models import User
+from users.buffers import last_login_buffer
+from users.models import Phone, User
+
+normalized_email_migration = import_module(
+    'users.migrations.0002_normalized_email'
+)
 
 
 class UserModelTests(TestCase):
@@ -47,3 +58,91 @@ class UserModelTests(TestCase):
             msg="""update_last_login() did not update the user's last_login
             field correctly."""
         )
+
+    def test_save_bumps_revision(self):
+        """Checks profile changes bump the revision and logins don't"""
+        revision = self.user.revision
+        self.user.first_name = 'Changed'
+        self.user.save()
+        self.assertEqual(
+            self.user.revision, revision + 1,
+            msg="""save() should bump the revision"""
+        )
+
+        self.user.update_last_login()
+        self.user.refresh_from_db()
+        self.assertEqual(
+            self.user.revision, revision + 1,
+            msg="""Saving last_login alone should keep the revision"""
+        )
+
+    def test_delete_fast_deletes_phones(self):
+        """Checks deleting a user removes its phones without loading them"""
+        baker.make(Phone, user=self.user, _quantity=3)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.user.delete()
+
+        phone_queries = [
+            query['sql'] for query in queries
+            if 'users_phone' in query['sql']
+        ]
+        self.assertEqual(
+            len(phone_queries), 1,
+            msg="""Phones should go in a single DELETE, without receivers"""
+        )
+        self.assertFalse(Phone.objects.exists())
+
+
+class NormalizedEmailMigrationTests(TestCase):
+    def test_backfill_matches_lookups(self):
+        """Checks the backfill normalizes e-mails as lookups do"""
+        emails = [' User@Tester.com\t', 'Usuário@DOMÍNIO.com.br']
+        for email in emails:
+            baker.make(User, email=email)
+        # What backfilling in SQL left behind
+        User.objects.update(normalized_email=Lower(Trim('email')))
+
+        normalized_email_migration.backfill_normalized_email(apps, None)
+
+        for email in emails:
+            self.assertEqual(
+                User.objects.filter_by_email(email.upper()).count(), 1,
+                msg=f"""{email!r} should be found after the backfill"""
+            )
+
+
+@override_settings(
+    LAST_LOGIN_WRITE_BEHIND=True, LAST_LOGIN_FLUSH_INTERVAL=3600
+)
+class LastLoginBufferTests(TestCase):
+    def setUp(self):
+        self.users = baker.make(User, _quantity=3)
+        self.last_login = max(user.last_login for user in self.users)
+
+    def test_update_last_login_is_buffered(self):
+        """Checks update_last_login() defers the write until flush()"""
+        for user in self.users:
+            with self.assertNumQueries(0):
+                user.update_last_login()
+
+        for user in self.users:
+            user.refresh_from_db()
+            self.assertLessEqual(
+                user.last_login,
+                self.last_login,
+                msg="""update_last_login() should not write last_login before
+                the buffer is flushed."""
+            )
+
+        with self.assertNumQueries(1):
+            written = last_login_buffer.flush()
+
+        self.assertEqual(written, 3)
+        for user in self.users:
+            user.refresh_from_db()
+            self.assertGreater(
+                user.last_login,
+                self.last_login,
+                msg="""flush() did not write the buffered last_login."""
+            )
@@ -0,0 +1,154 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from model_bakery import baker
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.constants import INVALID_REFRESH_TOKEN_ERROR
+from users.models import User, RevokedToken
+from users.revocation import revocation_key, revocation_list
+
+
+@override_settings(TOKEN_REVOCATION=True, TOKEN_REVOCATION_REFRESH_INTERVAL=0)
+class RevocationListTests(TestCase):
+    def setUp(self):
+        revocation_list.clear()
+
+    def tearDown(self):
+        revocation_list.clear()
+
+    def test_revoke(self):
+        """Checks a revoked jti is reported until it expires"""
+        jti = uuid.uuid4().hex
+        revocation_list.revoke(jti, time.time() + 60)
+
+        self.assertTrue(revocation_list.is_revoked(jti))
+        self.assertFalse(revocation_list.is_revoked(uuid.uuid4().hex))
+
+    def test_picks_up_other_workers_revocations(self):
+        """Checks rows added by other workers are loaded incrementally"""
+        self.assertFalse(revocation_list.is_revoked('abc'))
+        RevokedToken.objects.create(
+            jti='abc', expires_at=timezone.now() + timedelta(minutes=1)
+        )
+
+        with self.assertNumQueries(1):
+            self.assertTrue(revocation_list.is_revoked('abc'))
+
+    def test_expired_revocations_dropped(self):
+        """Checks expired revocations are neither reported nor kept"""
+        RevokedToken.objects.create(
+            jti='old', expires_at=timezone.now() - timedelta(minutes=1)
+        )
+        self.assertFalse(revocation_list.is_revoked('old'))
+
+        revocation_list.revoke('new', time.time() + 60)
+        self.assertFalse(
+            RevokedToken.objects.filter(jti='old').exists(),
+            msg="""Revoking should delete expired rows"""
+        )
+
+
+@override_settings(
+    TOKEN_REVOCATION=True, TOKEN_REVOCATION_REFRESH_INTERVAL=60
+)
+class SignoutViewTests(TestCase):
+    def setUp(self):
+        revocation_list.clear()
+        self.user = baker.make(User)
+        self.refresh_token = RefreshToken.for_user(self.user)
+        access_token = self.refresh_token.access_token
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {access_token}'}
+
+    def tearDown(self):
+        revocation_list.clear()
+
+    def sign_out(self, data=None):
+        return self.client.post(
+            reverse('signout'), data or {}, content_type='application/json',
+            **self.headers
+        )
+
+    def test_signout_revokes_tokens(self):
+        """Checks signing out rejects the access and refresh tokens"""
+        self.client.get(reverse('me'), **self.headers)
+        response = self.sign_out({'refreshToken': str(self.refresh_token)})
+        self.assertEqual(response.status_code, 204)
+
+        response = self.client.get(reverse('me'), **self.headers)
+        self.assertEqual(response.status_code, 401)
+        response = self.client.post(
+            reverse('token-refresh'),
+            {'refreshToken': str(self.refresh_token)},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_revocation_check_skips_database(self):
+        """Checks /me checks revocations without querying them"""
+        self.client.get(reverse('me'), **self.headers)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('me'), **self.headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_other_users_refresh_token(self):
+        """Checks a refresh token of another user is not accepted"""
+        other = RefreshToken.for_user(baker.make(User))
+        response = self.sign_out({'refreshToken': str(other)})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(),
+            {'message': INVALID_REFRESH_TOKEN_ERROR, 'errorCode': 400}
+        )
+
+    def test_refresh_rotates_and_revokes(self):
+        """Checks a traded refresh token is replaced and can't be reused"""
+        response = self.client.post(
+            reverse('token-refresh'),
+            {'refreshToken': str(self.refresh_token)},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        rotated = response.json()['refreshToken']
+        self.assertNotEqual(rotated, str(self.refresh_token))
+
+        response = self.client.post(
+            reverse('token-refresh'),
+            {'refreshToken': str(self.refresh_token)},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 401)
+        response = self.client.post(
+            reverse('token-refresh'), {'refreshToken': rotated},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_refresh_token_traded_once_across_workers(self):
+        """Checks a token traded on another worker can't be traded again"""
+        data = {'refreshToken': str(self.refresh_token)}
+        response = self.client.post(
+            reverse('token-refresh'), data, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        # This worker hasn't picked up the revocation yet
+        jti = self.refresh_token[api_settings.JTI_CLAIM]
+        revocation_list._expires_at.pop(revocation_key(jti))
+        response = self.client.post(
+            reverse('token-refresh'), data, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(TOKEN_REVOCATION=False)
+    def test_signout_disabled(self):
+        """Checks signout is not found when revocation is disabled"""
+        self.assertEqual(self.sign_out().status_code, 404)
@@ -1,7 +1,10 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
+import json
 from datetime import datetime
 from model_bakery import baker
 
@@ -10,8 +13,10 @@ from users.constants import (
 )
 from users.models import User, Phone
 from users.serializers import (
-    PhoneSerializer, UserModelSerializer, UserLoginSerializer
+    PhoneSerializer, UserModelSerializer, UserLoginSerializer,
+    UserFastSerializer, bulk_signup
 )
+from users.utils import format_data
 
 
 class PhoneSerializerTests(TestCase):
@@ -220,6 +225,25 @@ class UserModelSerializerTests(TestCase):
             EMAIL_ALREADY_REGISTERED_ERROR
         )
 
+    def test_usermodelserializer_deserialization_existing_email_case(self):
+        """Checks new User instance creation using UserModelSerializer
+
+        Test if UserModelSerializer deserialization is invalid due to e-mail
+        already in database with a different case."""
+        data = self.data
+        data['email'] = ' ' + self.email.upper()
+        serializer = UserModelSerializer(data=data)
+
+        self.assertFalse(
+            serializer.is_valid(),
+            msg="""User deserialization should not be valid since the e-mail
+            already exists in the database with a different case."""
+        )
+        self.assertEqual(
+            str(serializer.errors.get('non_field_errors')[0]),
+            EMAIL_ALREADY_REGISTERED_ERROR
+        )
+
     def test_usermodelserializer_deserialization(self):
         """Checks new User instance creation using UserModelSerializer"""
         serializer = UserModelSerializer(data=self.data)
@@ -230,6 +254,25 @@ class UserModelSerializerTests(TestCase):
             fields are present."""
         )
 
+    def test_usermodelserializer_create_writes_once(self):
+        """Checks signup inserts the phones without updating the new user"""
+        self.data['phones'] = [self.phone, dict(self.phone, number=912345678)]
+        serializer = UserModelSerializer(data=self.data)
+        serializer.is_valid()
+
+        with CaptureQueriesContext(connection) as queries:
+            user = serializer.save()
+
+        self.assertEqual(user.phones.count(), 2)
+        updates = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('UPDATE')
+        ]
+        self.assertEqual(
+            updates, [],
+            msg="""A new user has no revision to bump for its phones"""
+        )
+
     def test_usermodelserializer_update_not_allowed(self):
         """Checks User instance update using UserModelSerializer
 
@@ -244,6 +287,30 @@ class UserModelSerializerTests(TestCase):
             serializer.save()
 
 
+class UserFastSerializerTests(TestCase):
+    def setUp(self):
+        self.user = baker.make(
+            User, email='user@tester.com', first_name='Usér',
+            last_name='Tester'
+        )
+        baker.make(Phone, user=self.user, _quantity=2)
+
+    def test_parity_with_usermodelserializer(self):
+        """Checks UserFastSerializer matches the UserModelSerializer output
+
+        The fast serializer must build the same keys, in the same order and
+        with the same values as format_data(UserModelSerializer(user).data)."""
+        expected = format_data(UserModelSerializer(self.user).data)
+        data = UserFastSerializer(self.user).data
+
+        self.assertEqual(
+            json.dumps(data),
+            json.dumps(expected),
+            msg="""UserFastSerializer output differs from UserModelSerializer.
+            Expected: {}. Obtained: {}""".format(expected, data)
+        )
+
+
 class UserLoginSerializerTests(TestCase):
     def setUp(self):
         self.email = 'user@tester.com'
@@ -417,3 +484,119 @@ class UserLoginSerializerTests(TestCase):
                     time_before_login, last_login
                 )
         )
+
+    def test_userloginserializer_email_case(self):
+        """Checks User instance login using UserLoginSerializer
+
+        Test if UserLoginSerializer accepts the e-mail in a different case."""
+        data = {
+            'email': self.email.upper(),
+            'password': self.password
+        }
+        serializer = UserLoginSerializer(data=data)
+        self.assertTrue(
+            serializer.is_valid(),
+            msg="""User deserialization should be valid since e-mails are
+            compared case-insensitively."""
+        )
+
+    def test_userloginserializer_query_count(self):
+        """Checks the number of queries run by a successful login
+
+        The user is loaded once, its phones are prefetched once and last_login
+        is written with a single targeted UPDATE."""
+        data = {
+            'email': self.email,
+            'password': self.password
+        }
+        with self.assertNumQueries(3):
+            serializer = UserLoginSerializer(data=data)
+            serializer.is_valid()
+            serializer.save()
+
+
+class BulkSignupTests(TestCase):
+    def setUp(self):
+        self.email = 'user@tester.com'
+        self.phone = {
+            'number': 987465489,
+            'area_code': 81,
+            'country_code': '+55'
+        }
+        baker.make(User, email=self.email)
+
+    def get_payload(self, email):
+        return {
+            'email': email,
+            'first_name': 'User',
+            'last_name': 'Tester',
+            'password': 'test',
+            'phones': [self.phone]
+        }
+
+    def test_bulk_signup_late_conflict(self):
+        """Checks an e-mail registered during bulk_signup() fails its row only
+
+        A stale normalized e-mail stands in for a user registered between
+        the duplicate check and the insert."""
+        User.objects.filter(email=self.email).update(
+            normalized_email='stale@tester.com'
+        )
+        payloads = [
+            self.get_payload('first@tester.com'),
+            self.get_payload(self.email),
+            self.get_payload('second@tester.com')
+        ]
+        first, conflict, second = bulk_signup(payloads)
+
+        self.assertEqual(conflict, EMAIL_ALREADY_REGISTERED_ERROR)
+        self.assertEqual(first.email, 'first@tester.com')
+        self.assertEqual(second.phones.count(), 1)
+
+    def test_bulk_signup(self):
+        """Checks users and phones created by bulk_signup()"""
+        payloads = [self.get_payload(f'user{i}@tester.com') for i in range(3)]
+        results = bulk_signup(payloads)
+
+        for payload, user in zip(payloads, results):
+            self.assertIsInstance(
+                user,
+                User,
+                msg="""bulk_signup() should create a user for every valid
+                payload. Obtained: {}""".format(user)
+            )
+            self.assertEqual(user.email, payload['email'])
+            self.assertTrue(
+                user.check_password(payload['password']),
+                msg="""bulk_signup() did not store the hashed password."""
+            )
+
+        phones = Phone.objects.filter(user__in=results)
+        self.assertEqual(
+            phones.count(),
+            3,
+            msg="""bulk_signup() should create one phone per user. Obtained:
+            {}""".format(phones.count())
+        )
+
+    def test_bulk_signup_per_item_errors(self):
+        """Checks per-payload errors returned by bulk_signup()
+
+        Test if invalid payloads, registered e-mails and e-mails repeated in
+        the batch are rejected without stopping the valid payloads."""
+        missing_phones = self.get_payload('missing@tester.com')
+        missing_phones.pop('phones')
+        payloads = [
+            self.get_payload('new@tester.com'),
+            missing_phones,
+            self.get_payload(self.email),
+            self.get_payload('new@tester.com'),
+        ]
+
+        with self.assertNumQueries(7):
+            results = bulk_signup(payloads)
+
+        self.assertIsInstance(results[0], User)
+        self.assertEqual(str(results[1]), MISSING_FIELD_ERROR)
+        self.assertEqual(results[2], EMAIL_ALREADY_REGISTERED_ERROR)
+        self.assertEqual(results[3], EMAIL_ALREADY_REGISTERED_ERROR)
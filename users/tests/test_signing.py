@@ -0,0 +1,154 @@
+import os
+import tempfile
+from unittest import skipIf
+
+import jwt
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from model_bakery import baker
+from rest_framework_simplejwt import state
+
+from users import signing
+from users.cache import token_cache
+from users.models import User
+from users.utils import get_token_for_user
+
+
+def write_key(directory, name, key, private=True):
+    serialization = signing.serialization
+    if private:
+        data = key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        )
+    else:
+        data = key.public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+    path = os.path.join(directory, name)
+    with open(path, 'wb') as key_file:
+        key_file.write(data)
+    return path
+
+
+class JWKSViewTests(TestCase):
+    def test_symmetric_keys_not_published(self):
+        """Checks there is no key set to publish with HS256"""
+        response = self.client.get(reverse('jwks'))
+
+        self.assertEqual(response.status_code, 404)
+
+
+@skipIf(signing.serialization is None, 'cryptography is not installed')
+class KeyIdTokenBackendTests(TestCase):
+    def setUp(self):
+        from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.rsa_key = rsa.generate_private_key(65537, 2048)
+        self.retired_key = rsa.generate_private_key(65537, 2048)
+        self.ed25519_key = ed25519.Ed25519PrivateKey.generate()
+        self.original_backend = state.token_backend
+        self.user = baker.make(User)
+
+    def tearDown(self):
+        state.token_backend = self.original_backend
+        token_cache.clear()
+        self.directory.cleanup()
+
+    def install(self, algorithm, key, public_keys=()):
+        private_key_file = write_key(self.directory.name, 'private.pem', key)
+        public_key_files = [
+            write_key(self.directory.name, f'public{n}.pem', public_key, False)
+            for n, public_key in enumerate(public_keys)
+        ]
+        with override_settings(
+            JWT_ALGORITHM=algorithm, JWT_PRIVATE_KEY_FILE=private_key_file,
+            JWT_PUBLIC_KEY_FILES=public_key_files
+        ):
+            signing.install_token_backend()
+
+    def get_me(self, token):
+        return self.client.get(
+            reverse('me'), HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+
+    def test_rs256_tokens(self):
+        """Checks RS256 tokens name their key and verify with the JWKS"""
+        self.install('RS256', self.rsa_key)
+        token = get_token_for_user(self.user)
+
+        response = self.client.get(reverse('jwks'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('max-age=', response['Cache-Control'])
+        [jwk] = response.json()['keys']
+        self.assertEqual(jwt.get_unverified_header(token)['kid'], jwk['kid'])
+
+        public_key = jwt.algorithms.RSAAlgorithm.from_jwk(jwk)
+        payload = jwt.decode(token, public_key, algorithms=['RS256'])
+        self.assertEqual(
+            payload['user_id'], self.user.pk,
+            msg="""Tokens should verify with the published key alone"""
+        )
+        self.assertEqual(self.get_me(token).status_code, 200)
+
+    def test_eddsa_tokens(self):
+        """Checks EdDSA tokens are accepted by /me"""
+        self.install('EdDSA', self.ed25519_key)
+        token = get_token_for_user(self.user)
+
+        self.assertEqual(jwt.get_unverified_header(token)['alg'], 'EdDSA')
+        self.assertEqual(self.get_me(token).status_code, 200)
+        self.assertEqual(
+            self.client.get(reverse('jwks')).json()['keys'][0]['kty'], 'OKP'
+        )
+
+    def test_key_rotation(self):
+        """Checks tokens signed with a retired key stay valid while listed"""
+        self.install('RS256', self.retired_key)
+        token = get_token_for_user(self.user)
+
+        self.install('RS256', self.rsa_key, [self.retired_key.public_key()])
+        self.assertEqual(self.get_me(token).status_code, 200)
+        jwks = self.client.get(reverse('jwks')).json()
+        self.assertEqual(
+            len(jwks['keys']), 2,
+            msg="""Retired keys should stay published while listed"""
+        )
+
+        self.install('RS256', self.rsa_key)
+        self.assertEqual(
+            self.get_me(token).status_code, 401,
+            msg="""Tokens should be rejected once their key is removed"""
+        )
+
+    def test_key_type_mismatch(self):
+        """Checks keys that don't match JWT_ALGORITHM fail at startup"""
+        with self.assertRaises(ImproperlyConfigured):
+            self.install('RS256', self.ed25519_key)
+        with self.assertRaises(ImproperlyConfigured):
+            self.install('EdDSA', self.rsa_key)
+        with self.assertRaises(ImproperlyConfigured):
+            self.install(
+                'RS256', self.rsa_key, [self.ed25519_key.public_key()]
+            )
+
+        self.assertIs(
+            state.token_backend, self.original_backend,
+            msg="""The token backend should be left unchanged"""
+        )
+
+    def test_unparsable_key(self):
+        """Checks a key file that isn't a PEM key fails at startup"""
+        private_key_file = os.path.join(self.directory.name, 'private.pem')
+        with open(private_key_file, 'w') as key_file:
+            key_file.write('not a key')
+
+        with override_settings(
+            JWT_ALGORITHM='RS256', JWT_PRIVATE_KEY_FILE=private_key_file
+        ):
+            with self.assertRaises(ImproperlyConfigured):
+                signing.install_token_backend()
@@ -0,0 +1,26 @@
+from django.test import SimpleTestCase
+
+from users.startup import parse_importtime, walk
+
+IMPORTTIME = """import time: self [us] | cumulative | imported package
+import time:       100 |        100 |     leaf
+import time:       200 |        300 |   child
+import time:        50 |         50 |   sibling
+import time:        10 |        360 | parent
+import time:         5 |          5 | other
+"""
+
+
+class ParseImporttimeTests(SimpleTestCase):
+    def test_builds_tree(self):
+        """Checks children are attached to the import that follows them"""
+        tree = parse_importtime(IMPORTTIME)
+
+        self.assertEqual([node.name for node in tree], ['parent', 'other'])
+        parent = tree[0]
+        self.assertEqual(parent.cumulative, 360)
+        self.assertEqual(
+            [node.name for node in parent.children], ['child', 'sibling']
+        )
+        self.assertEqual(parent.children[0].children[0].name, 'leaf')
+        self.assertEqual(len(list(walk(tree))), 5)
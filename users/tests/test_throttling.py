@@ -0,0 +1,195 @@
+import base64
+from unittest import mock
+
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+
+from model_bakery import baker
+
+from users import hashing
+from users.constants import TOO_MANY_REQUESTS_ERROR
+from users.models import User
+from users.utils import get_token_for_user
+from users.throttling import (
+    TokenBucketStore, IPTokenBucketThrottle, EmailTokenBucketThrottle,
+    BulkSignupThrottle
+)
+
+
+def clear_throttles():
+    for throttle in (
+        IPTokenBucketThrottle, EmailTokenBucketThrottle, BulkSignupThrottle
+    ):
+        throttle.memory_store.clear()
+
+
+class TokenBucketStoreTests(TestCase):
+    def test_consume(self):
+        """Checks a bucket allows its burst and then refills over time"""
+        store = TokenBucketStore()
+        for _ in range(3):
+            self.assertEqual(store.consume('key', 1, 3, now=0), 0)
+
+        self.assertEqual(store.consume('key', 1, 3, now=0), 1)
+        self.assertEqual(store.consume('key', 1, 3, now=1), 0)
+
+    def test_cost(self):
+        """Checks a request can take several tokens at once"""
+        store = TokenBucketStore()
+        self.assertEqual(store.consume('key', 1, 10, now=0, cost=8), 0)
+        self.assertEqual(store.consume('key', 1, 10, now=0, cost=4), 2)
+
+    @override_settings(THROTTLE_MAX_KEYS=2)
+    def test_least_recently_used_bucket_is_evicted(self):
+        """Checks a new key replaces the least recently used bucket only"""
+        store = TokenBucketStore()
+        store.consume('first', 1, 1, now=0)
+        store.consume('second', 1, 1, now=0)
+        store.consume('first', 1, 1, now=0)
+        store.consume('third', 1, 1, now=0)
+
+        self.assertEqual(set(store._slots), {'first', 'third'})
+        self.assertEqual(len(store._tokens), 2)
+        self.assertEqual(
+            store.consume('first', 1, 1, now=0), 1,
+            msg="""Throttled buckets should survive evictions"""
+        )
+
+
+@override_settings(
+    LOGIN_THROTTLE_ENABLED=True, LOGIN_THROTTLE_IP_RATE='100/m',
+    LOGIN_THROTTLE_EMAIL_RATE='2/m'
+)
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        clear_throttles()
+        self.user = baker.make(User, email='user@tester.com')
+        self.user.set_password('test')
+        self.user.save()
+
+    def tearDown(self):
+        clear_throttles()
+
+    def test_signin_throttled_by_email(self):
+        """Checks signin is rejected before any query once throttled"""
+        data = {'email': 'USER@tester.com', 'password': 'wrong'}
+        for _ in range(2):
+            response = self.client.post(
+                reverse('signin'), data, 'application/json'
+            )
+            self.assertEqual(response.status_code, 400)
+
+        with self.assertNumQueries(0):
+            response = self.client.post(
+                reverse('signin'), data, 'application/json'
+            )
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(
+            response.json(),
+            {'message': TOO_MANY_REQUESTS_ERROR, 'errorCode': 429}
+        )
+        self.assertEqual(response['Retry-After'], '30')
+
+    @override_settings(LOGIN_THROTTLE_IP_RATE='1/m')
+    def test_signup_throttled_by_ip(self):
+        """Checks signup is throttled by client IP"""
+        self.client.post(reverse('signup'), {}, 'application/json')
+        response = self.client.post(reverse('signup'), {}, 'application/json')
+
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(LOGIN_THROTTLE_IP_RATE='1/m')
+    def test_basic_auth_throttled_without_hashing(self):
+        """Checks credentials in an Authorization header aren't checked"""
+        credentials = base64.b64encode(b'user@tester.com:test').decode()
+        self.client.post(reverse('signin'), {}, 'application/json')
+
+        with mock.patch.object(hashing, 'check_password') as check_password:
+            response = self.client.post(
+                reverse('signin'), {}, 'application/json',
+                HTTP_AUTHORIZATION=f'Basic {credentials}'
+            )
+
+        self.assertEqual(response.status_code, 429)
+        check_password.assert_not_called()
+
+    @override_settings(LOGIN_THROTTLE_IP_RATE='1/m')
+    def test_forwarded_for_ignored(self):
+        """Checks a client can't dodge the IP throttle with X-Forwarded-For"""
+        for address in ('10.0.0.1', '10.0.0.2'):
+            response = self.client.post(
+                reverse('signup'), {}, 'application/json',
+                HTTP_X_FORWARDED_FOR=address
+            )
+
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(LOGIN_THROTTLE_IP_RATE='1/m', THROTTLE_NUM_PROXIES=1)
+    def test_forwarded_for_behind_proxy(self):
+        """Checks the address seen by the proxy is used behind one"""
+        for address in ('10.0.0.1', '10.0.0.2'):
+            response = self.client.post(
+                reverse('signup'), {}, 'application/json',
+                HTTP_X_FORWARDED_FOR=f'1.1.1.1, {address}'
+            )
+
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(BULK_SIGNUP_THROTTLE_RATE='3/h')
+    def test_bulk_signup_throttled_per_user(self):
+        """Checks bulk signup takes a token for every user in the batch"""
+        staff = baker.make(User, is_staff=True)
+        token = get_token_for_user(staff)
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        response = self.client.post(
+            reverse('signup-bulk'), [{}, {}], 'application/json', **headers
+        )
+        self.assertEqual(response.status_code, 207)
+
+        response = self.client.post(
+            reverse('signup-bulk'), [{}, {}], 'application/json', **headers
+        )
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1200')
+
+
+@override_settings(
+    ROOT_URLCONF='api.async_urls', LOGIN_THROTTLE_ENABLED=True,
+    LOGIN_THROTTLE_IP_RATE='100/m', LOGIN_THROTTLE_EMAIL_RATE='1/m'
+)
+class AsyncLoginThrottleTests(TestCase):
+    def setUp(self):
+        clear_throttles()
+        self.client = AsyncClient()
+        self.user = baker.make(User, email='user@tester.com')
+        self.user.set_password('test')
+        self.user.save()
+
+    def tearDown(self):
+        clear_throttles()
+
+    async def test_signin_throttled_by_email(self):
+        """Checks the async signin reads the body and throttles by e-mail"""
+        data = {'email': 'user@tester.com', 'password': 'test'}
+        response = await self.client.post(
+            reverse('signin'), data, 'application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = await self.client.post(
+            reverse('signin'), data, 'application/json'
+        )
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(
+            response.json(),
+            {'message': TOO_MANY_REQUESTS_ERROR, 'errorCode': 429}
+        )
+
+    async def test_signup(self):
+        """Checks the async signup parses its body with throttling on"""
+        response = await self.client.post(
+            reverse('signup'), {'email': 'new@tester.com'}, 'application/json'
+        )
+
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,506 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.test import (
+    AsyncClient, TestCase, modify_settings, override_settings
+)
+from django.urls import reverse
+
+from model_bakery import baker
+
+from users.constants import (
+    EMAIL_ALREADY_REGISTERED_ERROR, INVALID_BULK_PAYLOAD_ERROR,
+    EMPTY_BULK_PAYLOAD_ERROR, BULK_LIMIT_EXCEEDED_ERROR, INVALID_LOGIN_ERROR,
+    INVALID_CURSOR_ERROR, MISSING_FIELD_ERROR, INVALID_REFRESH_TOKEN_ERROR
+)
+from users.cache import profile_cache
+from users.models import User, Phone
+from users.utils import get_token_for_user
+
+
+class UserBulkCreateViewTests(TestCase):
+    def setUp(self):
+        self.url = reverse('signup-bulk')
+        self.email = 'user@tester.com'
+        baker.make(User, email=self.email)
+        staff = baker.make(User, is_staff=True)
+        token = get_token_for_user(staff)
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def get_payload(self, email):
+        return {
+            'email': email,
+            'firstName': 'User',
+            'lastName': 'Tester',
+            'password': 'test',
+            'phones': [
+                {'number': 987465489, 'area_code': 81, 'country_code': '+55'}
+            ]
+        }
+
+    def test_bulk_signup(self):
+        """Checks per-item results returned by the bulk signup endpoint"""
+        payloads = [
+            self.get_payload('new@tester.com'),
+            self.get_payload(self.email)
+        ]
+        response = self.client.post(
+            self.url, payloads, 'application/json', **self.headers
+        )
+
+        self.assertEqual(response.status_code, 207)
+        created, rejected = response.json()['results']
+        self.assertEqual(created['user']['email'], 'new@tester.com')
+        self.assertEqual(created['user']['firstName'], 'User')
+        self.assertIn('token', created)
+        self.assertEqual(
+            rejected,
+            {'message': EMAIL_ALREADY_REGISTERED_ERROR, 'errorCode': 400}
+        )
+
+    def test_bulk_signup_invalid_payload(self):
+        """Checks the bulk signup endpoint rejects a non-list payload"""
+        response = self.client.post(
+            self.url, self.get_payload('new@tester.com'), 'application/json',
+            **self.headers
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(),
+            {'message': INVALID_BULK_PAYLOAD_ERROR, 'errorCode': 400}
+        )
+
+    def test_bulk_signup_empty_payload(self):
+        """Checks the bulk signup endpoint rejects an empty list"""
+        response = self.client.post(
+            self.url, [], 'application/json', **self.headers
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(),
+            {'message': EMPTY_BULK_PAYLOAD_ERROR, 'errorCode': 400}
+        )
+
+    @override_settings(BULK_SIGNUP_MAX_USERS=1)
+    def test_bulk_signup_limit(self):
+        """Checks the bulk signup endpoint rejects oversized batches"""
+        payloads = [
+            self.get_payload('first@tester.com'),
+            self.get_payload('second@tester.com')
+        ]
+        response = self.client.post(
+            self.url, payloads, 'application/json', **self.headers
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(),
+            {'message': BULK_LIMIT_EXCEEDED_ERROR, 'errorCode': 400}
+        )
+        self.assertFalse(User.objects.filter(email='first@tester.com'))
+
+    def test_bulk_signup_staff_only(self):
+        """Checks anonymous and non-staff users can't sign users up in bulk"""
+        payloads = [self.get_payload('new@tester.com')]
+        response = self.client.post(self.url, payloads, 'application/json')
+        self.assertEqual(response.status_code, 401)
+
+        token = get_token_for_user(User.objects.get(email=self.email))
+        response = self.client.post(
+            self.url, payloads, 'application/json',
+            HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(
+            User.objects.filter(email='new@tester.com'),
+            msg="""Rejected requests should create no user"""
+        )
+
+
+@override_settings(PROFILE_CACHE_ENABLED=True)
+class UserRetrieveViewCacheTests(TestCase):
+    def setUp(self):
+        self.url = reverse('me')
+        self.user = baker.make(User, email='user@tester.com')
+        baker.make(Phone, user=self.user)
+        token = get_token_for_user(self.user)
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        profile_cache.clear()
+
+    def tearDown(self):
+        profile_cache.clear()
+
+    def test_warm_profile_skips_database(self):
+        """Checks a cached /me response does not run any query"""
+        with self.assertNumQueries(2):
+            first = self.client.get(self.url, **self.headers)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, **self.headers)
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first.json(), second.json())
+
+    def test_phone_change_invalidates_profile(self):
+        """Checks saving a phone drops its owner's cached profile"""
+        self.client.get(self.url, **self.headers)
+        baker.make(Phone, user=self.user)
+
+        response = self.client.get(self.url, **self.headers)
+        self.assertEqual(len(response.json()['user']['phones']), 2)
+
+    def test_invalid_token(self):
+        """Checks /me rejects an invalid token"""
+        response = self.client.get(self.url, HTTP_AUTHORIZATION='Bearer abc')
+
+        self.assertEqual(response.status_code, 401)
+
+
+class TokenRefreshViewTests(TestCase):
+    def setUp(self):
+        self.url = reverse('token-refresh')
+        self.email = 'user@tester.com'
+        self.password = 'test'
+        user = baker.make(User, email=self.email)
+        user.set_password(self.password)
+        user.save()
+
+    def sign_in(self):
+        data = {'email': self.email, 'password': self.password}
+        response = self.client.post(
+            reverse('signin'), data, content_type='application/json'
+        )
+        return response.json()['refreshToken']
+
+    def refresh(self, refresh_token):
+        return self.client.post(
+            self.url, {'refreshToken': refresh_token},
+            content_type='application/json'
+        )
+
+    def test_refresh_issues_new_tokens(self):
+        """Checks a refresh token is traded for new tokens without queries"""
+        refresh_token = self.sign_in()
+
+        with self.assertNumQueries(0):
+            response = self.refresh(refresh_token)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(
+            data['refreshToken'], refresh_token,
+            msg="""Refresh tokens should not be rotated while rotated-out
+            tokens can't be revoked"""
+        )
+
+        response = self.client.get(
+            reverse('me'), HTTP_AUTHORIZATION=f"Bearer {data['token']}"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(data['refreshToken']).status_code, 200)
+
+    def test_access_token_rejected(self):
+        """Checks an access token can't be used as a refresh token"""
+        user = User.objects.get(email=self.email)
+        response = self.refresh(get_token_for_user(user))
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(
+            response.json(),
+            {'message': INVALID_REFRESH_TOKEN_ERROR, 'errorCode': 401}
+        )
+
+    def test_missing_refresh_token(self):
+        """Checks the refresh token is required"""
+        response = self.client.post(
+            self.url, {}, content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(), {'message': MISSING_FIELD_ERROR, 'errorCode': 400}
+        )
+
+
+class UserRetrieveViewETagTests(TestCase):
+    def setUp(self):
+        self.url = reverse('me')
+        self.user = baker.make(User, email='user@tester.com')
+        baker.make(Phone, user=self.user)
+        token = get_token_for_user(self.user)
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        profile_cache.clear()
+
+    def tearDown(self):
+        profile_cache.clear()
+
+    def get_revalidated(self, etag):
+        return self.client.get(
+            self.url, HTTP_IF_NONE_MATCH=etag, **self.headers
+        )
+
+    def test_unchanged_profile_not_modified(self):
+        """Checks a matching If-None-Match gets a 304 from the user row"""
+        etag = self.client.get(self.url, **self.headers)['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.get_revalidated(etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_phone_change_modifies_profile(self):
+        """Checks adding a phone changes the ETag"""
+        etag = self.client.get(self.url, **self.headers)['ETag']
+        baker.make(Phone, user=self.user)
+
+        response = self.get_revalidated(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.json()['user']['phones']), 2)
+
+    def test_phone_deletion_modifies_profile(self):
+        """Checks deleting a phone changes the ETag"""
+        etag = self.client.get(self.url, **self.headers)['ETag']
+        self.user.phones.get().delete()
+
+        response = self.get_revalidated(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['user']['phones'], [])
+
+    def test_user_change_modifies_profile(self):
+        """Checks saving the user changes the ETag, but a login alone too"""
+        etag = self.client.get(self.url, **self.headers)['ETag']
+        self.user.first_name = 'Changed'
+        self.user.save()
+
+        response = self.get_revalidated(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['firstName'], 'Changed')
+
+        etag = response['ETag']
+        self.user.update_last_login()
+        self.assertEqual(self.get_revalidated(etag).status_code, 200)
+
+    @override_settings(PROFILE_CACHE_ENABLED=True)
+    def test_cached_profile_not_modified(self):
+        """Checks a warm profile cache answers a 304 without queries"""
+        etag = self.client.get(self.url, **self.headers)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.get_revalidated(f'W/{etag}')
+
+        self.assertEqual(response.status_code, 304)
+
+
+class UserListViewTests(TestCase):
+    def setUp(self):
+        self.url = reverse('users')
+        self.staff = baker.make(User, email='staff@tester.com', is_staff=True)
+        self.users = baker.make(User, _quantity=5)
+        for user in self.users:
+            baker.make(Phone, user=user)
+        token = get_token_for_user(self.staff)
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def test_pages_cover_every_user(self):
+        """Checks following the cursors returns every user exactly once"""
+        emails = []
+        cursor = None
+        while True:
+            params = {'limit': 2}
+            if cursor:
+                params['cursor'] = cursor
+            with self.assertNumQueries(3):
+                response = self.client.get(self.url, params, **self.headers)
+            self.assertEqual(response.status_code, 200)
+            emails += [user['email'] for user in response.json()['users']]
+            cursor = response.json()['next']
+            if cursor is None:
+                break
+
+        expected = User.objects.order_by('created_at', 'id')
+        self.assertEqual(
+            emails, list(expected.values_list('email', flat=True)),
+            msg="""Pages should follow (created_at, id) without gaps"""
+        )
+
+    def test_email_prefix_search(self):
+        """Checks the e-mail search matches prefixes case-insensitively"""
+        response = self.client.get(
+            self.url, {'email': 'STAFF@'}, **self.headers
+        )
+
+        users = response.json()['users']
+        self.assertEqual([user['email'] for user in users], [self.staff.email])
+        self.assertIsNone(response.json()['next'])
+
+    def test_name_prefix_search(self):
+        """Checks the name search matches first and last name prefixes"""
+        first = baker.make(User, first_name='Ana', last_name='Souza')
+        last = baker.make(User, first_name='Bruno', last_name='Anaya')
+        first.first_name = 'Anabela'
+        first.save(update_fields=['first_name'])
+
+        response = self.client.get(self.url, {'name': ' ana'}, **self.headers)
+
+        users = response.json()['users']
+        self.assertEqual(
+            [user['email'] for user in users], [first.email, last.email],
+            msg="""Names should match by prefix regardless of case"""
+        )
+
+    def test_invalid_cursor(self):
+        """Checks a malformed cursor is rejected"""
+        response = self.client.get(
+            self.url, {'cursor': 'abc'}, **self.headers
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(),
+            {'message': INVALID_CURSOR_ERROR, 'errorCode': 400}
+        )
+
+    def test_staff_only(self):
+        """Checks anonymous and non-staff users can't list users"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+
+        token = get_token_for_user(self.users[0])
+        response = self.client.get(
+            self.url, HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()['errorCode'], 403)
+
+
+class PhoneLookupViewTests(TestCase):
+    def setUp(self):
+        self.url = reverse('phone-lookup')
+        staff = baker.make(User, is_staff=True)
+        self.user = baker.make(User, email='owner@tester.com')
+        baker.make(
+            Phone, user=self.user,
+            number=988887888, area_code=81, country_code='+55'
+        )
+        baker.make(
+            Phone, user=self.user,
+            number=988887888, area_code=11, country_code='+55'
+        )
+        token = get_token_for_user(staff)
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def test_lookup_returns_owner(self):
+        """Checks the owner of a phone is found once with all its phones"""
+        params = {'number': 988887888, 'area_code': 81, 'country_code': '+55'}
+        response = self.client.get(self.url, params, **self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        users = response.json()['users']
+        self.assertEqual([user['email'] for user in users], [self.user.email])
+        self.assertEqual(len(users[0]['phones']), 2)
+
+    def test_lookup_unknown_phone(self):
+        """Checks an unknown phone returns no users"""
+        params = {'number': 988887888, 'area_code': 21, 'country_code': '+55'}
+        response = self.client.get(self.url, params, **self.headers)
+
+        self.assertEqual(response.json(), {'users': []})
+
+    def test_lookup_missing_fields(self):
+        """Checks every part of the phone number is required"""
+        response = self.client.get(
+            self.url, {'number': 988887888}, **self.headers
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(), {'message': MISSING_FIELD_ERROR, 'errorCode': 400}
+        )
+
+
+@override_settings(ROOT_URLCONF='api.async_urls')
+class AsyncViewsTests(TestCase):
+    def setUp(self):
+        self.client = AsyncClient()
+        self.email = 'user@tester.com'
+        self.password = 'test'
+        self.user = baker.make(User, email=self.email)
+        self.user.set_password(self.password)
+        self.user.save()
+
+    async def test_signup(self):
+        """Checks the async signup view creates the user"""
+        data = {
+            'email': 'new@tester.com',
+            'firstName': 'User',
+            'lastName': 'Tester',
+            'password': 'test',
+            'phones': [
+                {'number': 987465489, 'area_code': 81, 'country_code': '+55'}
+            ]
+        }
+        response = await self.client.post(
+            reverse('signup'), data, 'application/json'
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['user']['firstName'], 'User')
+        user = await sync_to_async(User.objects.get)(email='new@tester.com')
+        self.assertTrue(user.check_password('test'))
+
+    async def test_signin(self):
+        """Checks the async signin view accepts valid credentials only"""
+        data = {'email': self.email, 'password': self.password}
+        response = await self.client.post(
+            reverse('signin'), data, 'application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('token', response.json())
+        self.assertIn('refreshToken', response.json())
+
+        data['password'] = 'wrong'
+        response = await self.client.post(
+            reverse('signin'), data, 'application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(),
+            {'message': INVALID_LOGIN_ERROR, 'errorCode': 400}
+        )
+
+
+@modify_settings(
+    MIDDLEWARE={'prepend': 'users.middleware.ServerTimingMiddleware'}
+)
+class ServerTimingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.user = baker.make(User, email='user@tester.com')
+        self.user.set_password('test')
+        self.user.save()
+
+    def test_signin_timings(self):
+        """Checks the Server-Timing header and log line of a signin"""
+        data = {'email': 'user@tester.com', 'password': 'test'}
+        with self.assertLogs('users.timing', 'INFO') as logs:
+            response = self.client.post(
+                reverse('signin'), data, 'application/json'
+            )
+
+        metrics = {
+            metric.split(';')[0]: metric
+            for metric in response['Server-Timing'].split(', ')
+        }
+        self.assertEqual(
+            set(metrics), {'db', 'hash', 'jwt', 'serialize', 'total'}
+        )
+        self.assertIn('desc="3 queries"', metrics['db'])
+
+        log_data = json.loads(logs.records[0].getMessage())
+        self.assertEqual(log_data['status'], 200)
+        self.assertEqual(log_data['db_queries'], 3)
+        self.assertGreater(log_data['hash_ms'], 0)
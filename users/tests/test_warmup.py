@@ -0,0 +1,29 @@
+from django.test import TestCase, override_settings
+
+from model_bakery import baker
+
+from users.bloom import email_index
+from users.models import User
+from users.warmup import warm_up
+
+
+class WarmUpTests(TestCase):
+    def test_warm_up_skips_database(self):
+        """Checks warming up before forking runs no query"""
+        with self.assertNumQueries(0):
+            warm_up()
+
+    @override_settings(
+        EMAIL_BLOOM_FILTER=True, EMAIL_BLOOM_REFRESH_INTERVAL=60
+    )
+    def test_warm_up_builds_email_index(self):
+        """Checks the e-mail Bloom filter is built before the first request"""
+        baker.make(User, email='user@tester.com')
+        try:
+            warm_up()
+
+            with self.assertNumQueries(0):
+                self.assertFalse(email_index.might_exist('new@tester.com'))
+            self.assertTrue(email_index.might_exist('user@tester.com'))
+        finally:
+            email_index.clear()
@@ -0,0 +1,184 @@
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+from .managers import normalize_email
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """Turns '<count>/<period>' into (tokens per second, bucket capacity)"""
+    count, period = rate.split('/')
+    return int(count) / PERIODS[period[0]], int(count)
+
+
+class TokenBucketStore:
+    """Token buckets of this process packed into two arrays of doubles
+
+    Each key maps to a slot holding its token count and the time it was last
+    refilled. When max_keys is reached, a new key takes over the slot of the
+    least recently used bucket, so memory stays bounded and no request pays
+    for more than one eviction."""
+
+    def __init__(self):
+        self._slots = OrderedDict()
+        self._tokens = array('d')
+        self._updated = array('d')
+        self._lock = threading.Lock()
+
+    def consume(self, key, rate, capacity, now, cost=1):
+        """Takes cost tokens from the bucket, or returns seconds to wait"""
+        cost = min(cost, capacity)
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is not None:
+                self._slots.move_to_end(key)
+            elif len(self._slots) >= settings.THROTTLE_MAX_KEYS:
+                _, slot = self._slots.popitem(last=False)
+                self._slots[key] = slot
+                self._tokens[slot] = capacity
+                self._updated[slot] = now
+            else:
+                slot = self._slots[key] = len(self._tokens)
+                self._tokens.append(capacity)
+                self._updated.append(now)
+
+            tokens = min(
+                capacity,
+                self._tokens[slot] + (now - self._updated[slot]) * rate
+            )
+            self._updated[slot] = now
+            if tokens >= cost:
+                self._tokens[slot] = tokens - cost
+                return 0
+
+            self._tokens[slot] = tokens
+            return (cost - tokens) / rate
+
+    def clear(self):
+        with self._lock:
+            self._slots = OrderedDict()
+            self._tokens = array('d')
+            self._updated = array('d')
+
+
+class CacheTokenBucketStore:
+    """Token buckets kept in the default cache
+
+    Shared by every worker when the cache backend is. Reads and writes are
+    not atomic, so concurrent requests may occasionally get an extra token."""
+
+    def consume(self, key, rate, capacity, now, cost=1):
+        cost = min(cost, capacity)
+        cache_key = f'throttle:{key}'
+        tokens, updated = cache.get(cache_key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        wait = 0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            wait = (cost - tokens) / rate
+        cache.set(cache_key, (tokens, now), timeout=int(capacity / rate) + 1)
+        return wait
+
+    def clear(self):
+        cache.clear()
+
+
+cache_store = CacheTokenBucketStore()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    scope = None
+    rate_setting = None
+    memory_store = None
+
+    def get_key(self, request):
+        raise NotImplementedError('.get_key() must be overridden')
+
+    def get_cost(self, request):
+        return 1
+
+    def allow_request(self, request, view):
+        if not settings.LOGIN_THROTTLE_ENABLED:
+            return True
+        return self.allow_key(self.get_key(request), self.get_cost(request))
+
+    def allow_key(self, key, cost=1):
+        """Takes cost tokens from the bucket of key; None is not throttled"""
+        if not settings.LOGIN_THROTTLE_ENABLED or key is None:
+            return True
+
+        if settings.THROTTLE_STORE == 'cache':
+            store = cache_store
+        else:
+            store = self.memory_store
+        rate, capacity = parse_rate(getattr(settings, self.rate_setting))
+        self._wait = store.consume(
+            f'{self.scope}:{key}', rate, capacity, time.time(), cost
+        )
+        return self._wait == 0
+
+    def wait(self):
+        return self._wait
+
+
+def get_client_ip(request):
+    """Address of the client, for a Django or a DRF request
+
+    X-Forwarded-For is set by clients as they please, so it is only read
+    when THROTTLE_NUM_PROXIES proxies in front of the app append to it; the
+    address the closest of them saw is then used."""
+    num_proxies = settings.THROTTLE_NUM_PROXIES
+    forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if num_proxies and forwarded_for:
+        addresses = forwarded_for.split(',')
+        return addresses[-min(num_proxies, len(addresses))].strip()
+    return request.META.get('REMOTE_ADDR')
+
+
+def get_email_key(email):
+    if not isinstance(email, str) or not email:
+        return None
+    return normalize_email(email)
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    scope = 'ip'
+    rate_setting = 'LOGIN_THROTTLE_IP_RATE'
+    memory_store = TokenBucketStore()
+
+    def get_key(self, request):
+        return get_client_ip(request)
+
+
+class EmailTokenBucketThrottle(TokenBucketThrottle):
+    scope = 'email'
+    rate_setting = 'LOGIN_THROTTLE_EMAIL_RATE'
+    memory_store = TokenBucketStore()
+
+    def get_key(self, request):
+        data = request.data
+        if not isinstance(data, dict):
+            return None
+        return get_email_key(data.get('email'))
+
+
+class BulkSignupThrottle(TokenBucketThrottle):
+    """Throttles bulk signup by client IP, one token per user in the batch"""
+    scope = 'bulk'
+    rate_setting = 'BULK_SIGNUP_THROTTLE_RATE'
+    memory_store = TokenBucketStore()
+
+    def get_key(self, request):
+        return get_client_ip(request)
+
+    def get_cost(self, request):
+        data = request.data
+        return max(len(data), 1) if isinstance(data, list) else 1
@@ -1,9 +1,20 @@
 from django.urls import path
 
-from .views import UserCreateView, UserLoginView, UserRetrieveView
+from .views import (
+    UserCreateView, UserBulkCreateView, UserLoginView, TokenRefreshView,
+    SignoutView, UserRetrieveView, UserListView, PhoneLookupView, JWKSView,
+    MetricsView
+)
 
 urlpatterns = [
     path('signup', UserCreateView.as_view(), name='signup'),
+    path('signup/bulk', UserBulkCreateView.as_view(), name='signup-bulk'),
     path('signin', UserLoginView.as_view(), name='signin'),
+    path('token/refresh', TokenRefreshView.as_view(), name='token-refresh'),
+    path('signout', SignoutView.as_view(), name='signout'),
     path('me', UserRetrieveView.as_view(), name='me'),
+    path('users', UserListView.as_view(), name='users'),
+    path('phones/lookup', PhoneLookupView.as_view(), name='phone-lookup'),
+    path('.well-known/jwks.json', JWKSView.as_view(), name='jwks'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
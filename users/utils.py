@@ -1,12 +1,89 @@
-from rest_framework_simplejwt.tokens import AccessToken
+from itertools import islice
+
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from . import timing
+from .revocation import revocation_list
 
 
 def get_token_for_user(user):
-    access_token = AccessToken.for_user(user)
-    return str(access_token)
+    with timing.phase('jwt'):
+        access_token = AccessToken.for_user(user)
+        return str(access_token)
+
+
+def get_refresh_token_for_user(user):
+    with timing.phase('jwt'):
+        refresh_token = RefreshToken.for_user(user)
+        return str(refresh_token)
+
+
+def refresh_tokens(raw_token):
+    """Trades a refresh token for a new access token and refresh token
+
+    Only the token's signature and claims are checked, plus its revocation;
+    the user isn't loaded. The refresh token is rotated only when the traded
+    one can be revoked, so a leaked copy can't outlive it, and is returned
+    unchanged otherwise. Raises TokenError when the token is invalid, expired
+    or revoked."""
+    with timing.phase('jwt'):
+        refresh_token = RefreshToken(raw_token)
+        jti = refresh_token[jwt_settings.JTI_CLAIM]
+        if revocation_list.is_revoked(jti):
+            raise TokenError('Token is revoked')
+
+        access_token = str(refresh_token.access_token)
+        rotate = (
+            jwt_settings.ROTATE_REFRESH_TOKENS
+            and jwt_settings.BLACKLIST_AFTER_ROTATION
+            and revocation_list.enabled
+        )
+        if not rotate:
+            return access_token, raw_token
+
+        # The table, not this process's copy of it, decides who traded first
+        if not revocation_list.revoke(jti, refresh_token['exp']):
+            raise TokenError('Token is revoked')
+        refresh_token.set_jti()
+        refresh_token.set_exp()
+        return access_token, str(refresh_token)
+
+
+def get_profile_etag(user):
+    """Tag of the /me response, changing whenever the profile does"""
+    last_login = user.last_login.timestamp() if user.last_login else 0
+    return f'"{user.pk}-{user.revision}-{last_login:.6f}"'
 
 
 def format_data(data):
     data['firstName'] = data.pop('first_name', '')
     data['lastName'] = data.pop('last_name', '')
     return data
+
+
+def get_error_message(errors):
+    """Picks the message reported to the client from serializer errors"""
+    try:
+        error = errors.get('non_field_errors')[0]
+    except TypeError:
+        error = errors.get('non_field_errors')
+    if not error:
+        try:
+            error = errors.get('phones')[0].get('non_field_errors')[0]
+        except (AttributeError, IndexError, TypeError):
+            error = next(iter(errors.values()), None)
+            if isinstance(error, list):
+                error = error[0]
+    return error
+
+
+def chunks(items, size):
+    """Splits any iterable, including generators, into lists of size items"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
@@ -1,14 +1,102 @@
-from django.contrib.auth.models import User
+import hmac
+import math
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.http import parse_etags
 from rest_framework.response import Response
 from rest_framework import generics, status, views
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.exceptions import (
+    AuthenticationFailed, NotAuthenticated, PermissionDenied, Throttled,
+    ValidationError
+)
+from rest_framework.permissions import IsAdminUser
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import metrics
+from .authentication import UserJWTAuthentication
+from .cache import profile_cache
+from .constants import (
+    MISSING_FIELD_ERROR, INVALID_BULK_PAYLOAD_ERROR, EMPTY_BULK_PAYLOAD_ERROR,
+    BULK_LIMIT_EXCEEDED_ERROR, TOO_MANY_REQUESTS_ERROR,
+    INVALID_REFRESH_TOKEN_ERROR, INVALID_CURSOR_ERROR, USER_LIST_DEFAULT_LIMIT,
+    USER_LIST_MAX_LIMIT
+)
+from .models import User
+from .pagination import search_users, paginate_users
+from .renderers import FastJSONRenderer
+from .revocation import revocation_list
+from .signing import get_jwks
+from .serializers import (
+    PhoneSerializer, UserModelSerializer, UserLoginSerializer,
+    UserFastSerializer, bulk_signup
+)
+from .throttling import (
+    IPTokenBucketThrottle, EmailTokenBucketThrottle, BulkSignupThrottle
+)
+from .utils import (
+    get_token_for_user, get_refresh_token_for_user, refresh_tokens,
+    get_error_message, get_profile_etag
+)
+
+
+def etag_matches(etag, if_none_match):
+    """Weak comparison of etag against an If-None-Match header"""
+    etags = [
+        tag[2:] if tag.startswith('W/') else tag
+        for tag in parse_etags(if_none_match)
+    ]
+    return '*' in etags or etag in etags
+
+
+def get_refresh_token(raw_token):
+    try:
+        return RefreshToken(raw_token)
+    except TokenError:
+        return None
+
 
-from .serializers import UserModelSerializer, UserLoginSerializer
-from .utils import get_token_for_user, format_data
+class LoginThrottleMixin:
+    """Rejects throttled requests before any hashing or database work"""
+    # DRF authentication runs before throttling and may check a password
+    authentication_classes = []
+    throttle_classes = [IPTokenBucketThrottle, EmailTokenBucketThrottle]
 
+    def handle_exception(self, exc):
+        if not isinstance(exc, Throttled):
+            return super().handle_exception(exc)
+
+        response_data = {'message': TOO_MANY_REQUESTS_ERROR, 'errorCode': 429}
+        response = Response(
+            response_data, status=status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        if exc.wait is not None:
+            response['Retry-After'] = str(math.ceil(exc.wait))
+        return response
+
+
+class StaffOnlyMixin:
+    """Lets only staff users in, answering in the API's error format"""
+    authentication_classes = [UserJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def handle_exception(self, exc):
+        if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+            response_data = {'message': 'Unauthorized', 'errorCode': 401}
+            return Response(response_data, status=status.HTTP_401_UNAUTHORIZED)
 
-class UserCreateView(generics.CreateAPIView):
+        if isinstance(exc, PermissionDenied):
+            response_data = {'message': 'Forbidden', 'errorCode': 403}
+            return Response(response_data, status=status.HTTP_403_FORBIDDEN)
+
+        return super().handle_exception(exc)
+
+
+class UserCreateView(LoginThrottleMixin, generics.CreateAPIView):
     serializer_class = UserModelSerializer
+    renderer_classes = [FastJSONRenderer]
 
     def post(self, request):
         data = request.data
@@ -18,31 +106,82 @@ class UserCreateView(generics.CreateAPIView):
         serializer = self.get_serializer(data=data)
 
         if serializer.is_valid():
-            user = serializer.save()
+            try:
+                user = serializer.save()
+            except ValidationError as error:
+                response_data = {'message': error.detail[0], 'errorCode': 400}
+                return Response(
+                    response_data, status=status.HTTP_400_BAD_REQUEST
+                )
+
             token = get_token_for_user(user)
             response_data = {
-                'user': format_data(serializer.data),
-                'token': token
+                'user': UserFastSerializer(user).data,
+                'token': token,
+                'refreshToken': get_refresh_token_for_user(user)
             }
             return Response(response_data, status=status.HTTP_201_CREATED)
 
-        try:
-            error = serializer.errors.get('non_field_errors')[0]
-        except TypeError:
-            error = serializer.errors.get('non_field_errors')
-        if not error:
-            error = (
-                serializer.errors.get('phones')[0].get('non_field_errors')[0]
-            )
-
         response_data = {
-            'message': error,
+            'message': get_error_message(serializer.errors),
             'errorCode': 400
         }
         return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserLoginView(views.APIView):
+class UserBulkCreateView(StaffOnlyMixin, LoginThrottleMixin, views.APIView):
+    renderer_classes = [FastJSONRenderer]
+    throttle_classes = [BulkSignupThrottle]
+
+    def post(self, request):
+        payloads = request.data
+        if not isinstance(payloads, list):
+            response_data = {
+                'message': INVALID_BULK_PAYLOAD_ERROR,
+                'errorCode': 400
+            }
+            return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+        if not payloads:
+            response_data = {
+                'message': EMPTY_BULK_PAYLOAD_ERROR,
+                'errorCode': 400
+            }
+            return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(payloads) > settings.BULK_SIGNUP_MAX_USERS:
+            response_data = {
+                'message': BULK_LIMIT_EXCEEDED_ERROR,
+                'errorCode': 400
+            }
+            return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+        for data in payloads:
+            if isinstance(data, dict):
+                data['first_name'] = data.pop('firstName', '')
+                data['last_name'] = data.pop('lastName', '')
+
+        results = []
+        for result in bulk_signup(payloads):
+            if isinstance(result, User):
+                results.append({
+                    'user': UserFastSerializer(result).data,
+                    'token': get_token_for_user(result)
+                })
+            else:
+                results.append({'message': result, 'errorCode': 400})
+
+        created = all('user' in result for result in results)
+        response_status = (
+            status.HTTP_201_CREATED if created
+            else status.HTTP_207_MULTI_STATUS
+        )
+        return Response({'results': results}, status=response_status)
+
+
+class UserLoginView(LoginThrottleMixin, views.APIView):
+    renderer_classes = [FastJSONRenderer]
+
     def post(self, request):
         serializer = UserLoginSerializer(data=request.data)
         if serializer.is_valid():
@@ -57,8 +196,71 @@ class UserLoginView(views.APIView):
         return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
 
 
+class TokenRefreshView(views.APIView):
+    authentication_classes = []
+    renderer_classes = [FastJSONRenderer]
+
+    def post(self, request):
+        raw_token = request.data.get('refreshToken')
+        if not raw_token:
+            response_data = {'message': MISSING_FIELD_ERROR, 'errorCode': 400}
+            return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            token, refresh_token = refresh_tokens(raw_token)
+        except TokenError:
+            response_data = {
+                'message': INVALID_REFRESH_TOKEN_ERROR,
+                'errorCode': 401
+            }
+            return Response(response_data, status=status.HTTP_401_UNAUTHORIZED)
+
+        response_data = {'token': token, 'refreshToken': refresh_token}
+        return Response(response_data, status=status.HTTP_200_OK)
+
+
+class SignoutView(views.APIView):
+    authentication_classes = []
+    renderer_classes = [FastJSONRenderer]
+
+    def post(self, request):
+        if not revocation_list.enabled:
+            response_data = {'message': 'Not found', 'errorCode': 404}
+            return Response(response_data, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            access_token = UserJWTAuthentication().authenticate_token(request)
+        except AuthenticationFailed:
+            response_data = {
+                'message': 'Unauthorized - invalid session',
+                'errorCode': 401
+            }
+            return Response(response_data, status=status.HTTP_401_UNAUTHORIZED)
+
+        tokens = [access_token]
+        raw_token = request.data.get('refreshToken')
+        if raw_token:
+            refresh_token = get_refresh_token(raw_token)
+            user_id_claim = api_settings.USER_ID_CLAIM
+            if (refresh_token is None or refresh_token[user_id_claim]
+                    != access_token[user_id_claim]):
+                response_data = {
+                    'message': INVALID_REFRESH_TOKEN_ERROR,
+                    'errorCode': 400
+                }
+                return Response(
+                    response_data, status=status.HTTP_400_BAD_REQUEST
+                )
+            tokens.append(refresh_token)
+
+        for token in tokens:
+            revocation_list.revoke(token[api_settings.JTI_CLAIM], token['exp'])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class UserRetrieveView(generics.RetrieveAPIView):
     serializer_class = UserModelSerializer
+    renderer_classes = [FastJSONRenderer]
 
     def get(self, request):
         token = request.META.get('HTTP_AUTHORIZATION')
@@ -66,8 +268,13 @@ class UserRetrieveView(generics.RetrieveAPIView):
             response_data = {'message': 'Unauthorized', 'errorCode': 401}
             return Response(response_data, status=status.HTTP_401_UNAUTHORIZED)
 
+        authentication = UserJWTAuthentication()
         try:
-            user, token = JWTAuthentication().authenticate(request)
+            validated_token = authentication.authenticate_token(request)
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+            cached = profile_cache.get(user_id)
+            if cached is None:
+                user = authentication.get_user(validated_token)
         except:
             response_data = {
                 'message': 'Unauthorized - invalid session',
@@ -75,7 +282,107 @@ class UserRetrieveView(generics.RetrieveAPIView):
             }
             return Response(response_data, status=status.HTTP_401_UNAUTHORIZED)
 
-        serializer = self.get_serializer(user)
-        response_data = {'user': format_data(serializer.data)}
+        # The user row alone decides the ETag, so a client holding the
+        # current profile gets a 304 before phones are loaded or serialized.
+        if cached is None:
+            etag = get_profile_etag(user)
+        else:
+            etag, profile = cached
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match and etag_matches(etag, if_none_match):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            if cached is None:
+                profile = UserFastSerializer(user).data
+                profile_cache.set(user_id, (etag, profile))
+            response = Response({'user': profile}, status=status.HTTP_200_OK)
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class UserListView(StaffOnlyMixin, views.APIView):
+    renderer_classes = [FastJSONRenderer]
+
+    def get(self, request):
+        limit = request.query_params.get('limit', USER_LIST_DEFAULT_LIMIT)
+        try:
+            limit = min(max(int(limit), 1), USER_LIST_MAX_LIMIT)
+        except ValueError:
+            limit = USER_LIST_DEFAULT_LIMIT
+
+        queryset = search_users(
+            User.objects.all(),
+            email=request.query_params.get('email'),
+            name=request.query_params.get('name')
+        )
+        try:
+            users, next_cursor = paginate_users(
+                queryset, request.query_params.get('cursor'), limit
+            )
+        except ValueError:
+            response_data = {'message': INVALID_CURSOR_ERROR, 'errorCode': 400}
+            return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+        response_data = {
+            'users': [UserFastSerializer(user).data for user in users],
+            'next': next_cursor
+        }
+        return Response(response_data, status=status.HTTP_200_OK)
+
+
+class PhoneLookupView(StaffOnlyMixin, views.APIView):
+    renderer_classes = [FastJSONRenderer]
+
+    def get(self, request):
+        serializer = PhoneSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            response_data = {
+                'message': get_error_message(serializer.errors),
+                'errorCode': 400
+            }
+            return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
 
+        phone = serializer.validated_data
+        users = User.objects.filter_by_phone(
+            phone['country_code'], phone['area_code'], phone['number']
+        ).order_by('id').prefetch_related('phones')
+
+        response_data = {
+            'users': [UserFastSerializer(user).data for user in users]
+        }
         return Response(response_data, status=status.HTTP_200_OK)
+
+
+class JWKSView(views.APIView):
+    renderer_classes = [FastJSONRenderer]
+
+    def get(self, request):
+        jwks = get_jwks()
+        if jwks is None:
+            response_data = {'message': 'Not found', 'errorCode': 404}
+            return Response(response_data, status=status.HTTP_404_NOT_FOUND)
+
+        response = Response(jwks, status=status.HTTP_200_OK)
+        response['Cache-Control'] = f'public, max-age={settings.JWKS_MAX_AGE}'
+        return response
+
+
+class MetricsView(views.APIView):
+    def get(self, request):
+        if not (metrics.registry.enabled and settings.METRICS_TOKEN):
+            response_data = {'message': 'Not found', 'errorCode': 404}
+            return Response(response_data, status=status.HTTP_404_NOT_FOUND)
+
+        authorization = request.META.get('HTTP_AUTHORIZATION', '')
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        if not hmac.compare_digest(authorization.encode(), expected.encode()):
+            response_data = {'message': 'Unauthorized', 'errorCode': 401}
+            return Response(response_data, status=status.HTTP_401_UNAUTHORIZED)
+
+        return HttpResponse(
+            metrics.registry.collect(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
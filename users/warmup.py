@@ -0,0 +1,32 @@
+"""Work that Django and DRF otherwise do lazily on the first requests
+
+gunicorn.conf.py runs warm_up() in the master after preloading the app, so
+every forked worker starts with it done and shares the memory it allocated.
+The e-mail Bloom filter is built here too when it is enabled."""
+from django.contrib.auth.hashers import get_hasher
+from django.urls import resolve, reverse
+
+from . import urls
+from .bloom import email_index
+from .serializers import (
+    PhoneSerializer, UserModelSerializer, UserLoginSerializer
+)
+
+
+def warm_up():
+    # Builds the fields and their validators, importing what they need
+    for serializer_class in (
+        PhoneSerializer, UserModelSerializer, UserLoginSerializer
+    ):
+        serializer_class().fields
+
+    # Compiles the URL resolver in both directions
+    for pattern in urls.urlpatterns:
+        resolve(reverse(pattern.name))
+
+    get_hasher('default')
+
+    # One scan of the users table in the master, instead of one in the first
+    # signup or signin of every worker
+    if email_index.enabled:
+        email_index.build()